@@ -1,12 +1,15 @@
-
 import discord
 from discord.ext import commands
 from discord.ui import View, Button, Modal, TextInput
+import asyncio
 import datetime
-import json
 import os
 from dotenv import load_dotenv
-from image_parser import parse_game_image
+from image_parser import parse_game_image, download_image_bytes
+from job_queue import ParseJobQueue
+from match_log import MatchLog, MatchRepository
+from scrim_records import MatchRecord
+from scrim_stats import ScrimAggregates, StatsBucket
 
 def format_mvp_svp(mvp: dict, svp: dict) -> str | None:
     """MVP와 SVP 정보를 포맷팅된 문자열로 반환"""
@@ -26,9 +29,19 @@ load_dotenv()
 
 TOKEN = os.getenv("SCRIM_BOT_TOKEN")
 SCRIM_CHANNEL_ID = int(os.getenv("SCRIM_CHANNEL_ID"))
-DATA_FILE = "scrim_data.json"
+DATA_FILE = "scrim_data.json"  # 예전 저장 파일 (처음 실행 시 경기 기록으로 옮김)
+MATCH_LOG_FILE = "scrim_matches.jsonl"
 ADMIN_ROLE_ID = int(os.getenv("ADMIN_ROLE_ID"))
 
+# 이미지 분석 워커 설정
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))  # 동시에 분석하는 스크린샷 수
+PARSE_MAX_ATTEMPTS = 3  # 작업당 최대 시도 횟수
+PARSE_RETRY_BASE_SECONDS = 5  # 재시도 간격 (5초, 10초, 20초 ...)
+BULK_MAX_IMAGES = 10  # 한 번에 등록할 수 있는 스크린샷 수 (디스코드 메시지 첨부 최대 개수)
+
+# 시즌 시작일 (YYYY-MM-DD, !team / !player의 "시즌" 기간에 사용)
+SEASON_START = datetime.date.fromisoformat(os.getenv("SEASON_START")) if os.getenv("SEASON_START") else None
+
 # 팀 선수 닉네임 및 포지션 (포지션:닉네임 형식)
 # 예: {"닉네임1": "탑", "닉네임2": "정글", ...}
 TEAM_PLAYERS = {}
@@ -47,24 +60,37 @@ intents.members = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+# 스크린샷 분석 작업 큐 (재시작해도 남아 있음)
+parse_queue = ParseJobQueue()
+parse_wakeup = asyncio.Event()  # 새 작업이 들어오면 대기 중인 워커를 깨움
+parse_workers: list[asyncio.Task] = []
+batch_locks: dict[int, asyncio.Lock] = {}  # 묶음별 상태 메시지 수정 순서 보장
+
 # ==========================================
 # 데이터 저장/불러오기
 # ==========================================
+match_log = MatchLog(MATCH_LOG_FILE)
+match_log.import_json(DATA_FILE)
+
+# 읽기 명령어는 메모리의 경기 목록을 사용 (파일이 바뀐 경우에만 다시 읽음)
+# 날짜 / 게임 시간은 불러올 때 MatchRecord로 한 번만 해석
+match_repo = MatchRepository(match_log, record=MatchRecord)
+
+# 챔피언 / 선수 / 팀 통계 누적 집계 (새 경기만 더함)
+scrim_aggregates = ScrimAggregates()
+
 def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:  # 빈 파일인 경우
-                    return {"matches": []}
-                return json.loads(content)
-        except json.JSONDecodeError:
-            return {"matches": []}
-    return {"matches": []}
-
-def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    return {"matches": match_repo.matches()}
+
+def load_aggregates() -> ScrimAggregates:
+    """경기 기록에 새로 추가된 경기까지 반영한 누적 집계"""
+    scrim_aggregates.sync(match_repo.matches())
+    return scrim_aggregates
+
+def save_matches(matches: list):
+    """새 경기를 기록 끝에 추가 (기존 기록은 다시 쓰지 않음)"""
+    match_repo.add(matches)
+    load_aggregates()
 
 def has_admin_role():
     """ADMIN_ROLE_ID 권한 체크 데코레이터"""
@@ -105,20 +131,10 @@ class ImageConfirmView(View):
     @discord.ui.button(label="✅ 확인 및 저장", style=discord.ButtonStyle.success, row=1)
     async def confirm_save(self, interaction: discord.Interaction, button: Button):
         # 경기 데이터 구성
-        match_data = {
-            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "result": "승리" if self.parsed_data["is_win"] else "패배",
-            "game_time": self.parsed_data.get("game_time"),
-            "side": self.side,
-            "memo": self.memo,
-            "team1": self.parsed_data["team1"],
-            "team2": self.parsed_data["team2"],
-        }
+        match_data = build_match_data(self.parsed_data, self.side, self.memo)
 
         # 저장
-        data = load_data()
-        data["matches"].append(match_data)
-        save_data(data)
+        save_matches([match_data])
 
         # 결과 임베드 생성
         embed = create_match_embed(match_data)
@@ -133,8 +149,117 @@ class ImageConfirmView(View):
         await interaction.delete_original_response()
         await interaction.channel.send("❌ 등록이 취소되었습니다.", delete_after=5)
 
+class BulkConfirmView(View):
+    """
+    여러 경기 스크린샷을 한 번에 확인하는 View
+    - ◀ / ▶로 경기를 넘기며 경기마다 진영과 메모를 설정
+    - 전체 저장 시 한 번에 기록
+    """
+
+    def __init__(self, games: list[dict], author_id: int, failed: int = 0):
+        super().__init__(timeout=900)
+        self.games = games
+        self.author_id = author_id
+        self.failed = failed
+        self.sides = ["blue"] * len(games)
+        self.memos = [""] * len(games)
+        self.page = 0
+
+    # MemoInputModal이 현재 페이지 경기의 메모를 읽고 쓰도록
+    @property
+    def memo(self) -> str:
+        return self.memos[self.page]
+
+    @memo.setter
+    def memo(self, value: str):
+        self.memos[self.page] = value
+
+    def render(self) -> discord.Embed:
+        """현재 페이지 경기의 미리보기 임베드"""
+        embed = create_preview_embed(self.games[self.page])
+        embed.title = f"📸 이미지 분석 결과 ({self.page + 1}/{len(self.games)})"
+        side_text = "🔵 블루" if self.sides[self.page] == "blue" else "🔴 레드"
+        footer = f"진영: {side_text}"
+        if self.memos[self.page]:
+            footer += f" | 메모: {self.memos[self.page][:50]}"
+        if self.failed:
+            footer += f" | ⚠️ 분석 실패 {self.failed}장 제외"
+        embed.set_footer(text=footer + "\n✅ 전체 저장 시 모든 경기가 한 번에 저장됩니다")
+        return embed
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary, row=0)
+    async def prev_page(self, interaction: discord.Interaction, button: Button):
+        self.page = (self.page - 1) % len(self.games)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary, row=0)
+    async def next_page(self, interaction: discord.Interaction, button: Button):
+        self.page = (self.page + 1) % len(self.games)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="🔵 블루 진영", style=discord.ButtonStyle.primary, row=1)
+    async def set_blue(self, interaction: discord.Interaction, button: Button):
+        self.sides[self.page] = "blue"
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="🔴 레드 진영", style=discord.ButtonStyle.danger, row=1)
+    async def set_red(self, interaction: discord.Interaction, button: Button):
+        self.sides[self.page] = "red"
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="📝 메모 추가", style=discord.ButtonStyle.secondary, row=2)
+    async def add_memo(self, interaction: discord.Interaction, button: Button):
+        modal = MemoInputModal(self)
+        await interaction.response.send_modal(modal)
+
+    @discord.ui.button(label="✅ 전체 저장", style=discord.ButtonStyle.success, row=2)
+    async def confirm_save(self, interaction: discord.Interaction, button: Button):
+        matches = [
+            build_match_data(parsed_data, side, memo)
+            for parsed_data, side, memo in zip(self.games, self.sides, self.memos)
+        ]
+
+        # 한 번에 저장
+        save_matches(matches)
+
+        # 요약 임베드 (경기별 상세 임베드를 모두 붙이면 메시지 길이 제한을 넘음)
+        embed = discord.Embed(title=f"✅ {len(matches)}경기 저장 완료", color=0x2ecc71)
+        lines = []
+        for i, match in enumerate(matches, 1):
+            emoji = "🏆" if match["result"] == "승리" else "💀"
+            side_emoji = "🔵" if match["side"] == "blue" else "🔴"
+            line = f"{emoji} #{i} {match['result']} {side_emoji}"
+            if match.get("game_time"):
+                line += f" ⏱️ {match['game_time']}"
+            lines.append(line)
+        embed.description = "\n".join(lines)
+
+        await interaction.response.defer()
+        await interaction.delete_original_response()
+        await interaction.channel.send(embed=embed)
+        self.stop()
+
+    @discord.ui.button(label="❌ 취소", style=discord.ButtonStyle.secondary, row=2)
+    async def cancel(self, interaction: discord.Interaction, button: Button):
+        await interaction.response.defer()
+        await interaction.delete_original_response()
+        await interaction.channel.send("❌ 등록이 취소되었습니다.", delete_after=5)
+        self.stop()
+
+def build_match_data(parsed_data: dict, side: str, memo: str) -> dict:
+    """분석 결과 + 진영/메모 → 저장할 경기 데이터"""
+    return {
+        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "result": "승리" if parsed_data["is_win"] else "패배",
+        "game_time": parsed_data.get("game_time"),
+        "side": side,
+        "memo": memo,
+        "team1": parsed_data["team1"],
+        "team2": parsed_data["team2"],
+    }
+
 class MemoInputModal(Modal):
-    def __init__(self, view: ImageConfirmView):
+    def __init__(self, view: ImageConfirmView | BulkConfirmView):
         super().__init__(title="메모 추가")
         self.parent_view = view
         self.memo = TextInput(
@@ -369,144 +494,176 @@ def create_preview_embed(parsed_data: dict) -> discord.Embed:
 # ==========================================
 # 통계 함수
 # ==========================================
-def calculate_stats(matches: list, period: str = "all") -> dict:
-    """전적 통계 계산"""
-    now = datetime.datetime.now()
-    filtered = []
-
-    for match in matches:
-        match_date = datetime.datetime.strptime(match["date"], "%Y-%m-%d %H:%M")
-        if period == "week":
-            if (now - match_date).days <= 7:
-                filtered.append(match)
-        elif period == "month":
-            if (now - match_date).days <= 30:
-                filtered.append(match)
-        else:
-            filtered.append(match)
-
-    if not filtered:
+def parse_period(period: str | None) -> tuple[datetime.date | None, datetime.date | None, str] | None:
+    """
+    기간 인자 → (시작일, 종료일, 표시 이름), 형식이 틀리면 None
+    - 전체 / all, 주간 / week (최근 7일), 월간 / month (최근 30일), 시즌 / season (SEASON_START부터)
+    - 숫자 N: 최근 N일
+    - YYYY-MM-DD: 그날부터, YYYY-MM-DD~YYYY-MM-DD: 해당 기간 (양 끝 포함)
+    """
+    today = datetime.date.today()
+    text = (period or "all").strip().lower()
+    if text in ("all", "전체"):
+        return None, None, "전체"
+    if text in ("week", "주간"):
+        text = "7"
+    elif text in ("month", "월간"):
+        text = "30"
+    if text.isdigit():
+        # 너무 큰 숫자는 날짜 범위를 벗어나므로 형식 오류로 처리
+        try:
+            days = int(text)
+            return today - datetime.timedelta(days=days), None, f"최근 {days}일"
+        except (ValueError, OverflowError):
+            return None
+    if text in ("season", "시즌"):
+        if SEASON_START is None:
+            return None
+        return SEASON_START, None, f"시즌 ({SEASON_START} ~)"
+
+    parts = text.replace("~", " ").split()
+    try:
+        dates = [datetime.date.fromisoformat(part) for part in parts]
+    except ValueError:
         return None
+    if len(dates) == 1:
+        return dates[0], None, f"{dates[0]} ~"
+    if len(dates) == 2 and dates[0] <= dates[1]:
+        return dates[0], dates[1], f"{dates[0]} ~ {dates[1]}"
+    return None
 
-    total = len(filtered)
-    wins = sum(1 for m in filtered if m["result"] == "승리")
-    losses = total - wins
-    win_rate = (wins / total * 100) if total > 0 else 0
+def load_period_stats(start: datetime.date | None, end: datetime.date | None) -> StatsBucket:
+    """기간 통계 (전체 기간은 누적 집계 그대로, 그 외에는 날짜별 묶음을 이어 붙임)"""
+    aggregates = load_aggregates()
+    if start is None and end is None:
+        return aggregates
+    return aggregates.window(start, end)
 
-    # 챔피언 통계 (team1 = 아군 팀)
-    champion_stats = {}
-    for match in filtered:
-        team1 = match.get("team1", {})
-        for player in team1.get("players", []):
-            champ = player.get("champion")
-            position = player.get("position")
-            if champ and champ != "알 수 없음":
-                key = f"{position}-{champ}"
-                if key not in champion_stats:
-                    champion_stats[key] = {
-                        "wins": 0, "losses": 0,
-                        "kills": 0, "deaths": 0, "assists": 0,
-                        "damage": 0, "gold": 0, "gold_per_min": 0,
-                        "gold_share": 0, "damage_per_gold": 0,
-                        "level": 0, "games": 0,
-                        "position": position, "champion": champ,
-                        "total_game_time": 0
-                    }
-                stats = champion_stats[key]
-                stats["games"] += 1
-                stats["kills"] += player.get("kills", 0)
-                stats["deaths"] += player.get("deaths", 0)
-                stats["assists"] += player.get("assists", 0)
-                stats["damage"] += player.get("damage", 0)
-                stats["gold"] += player.get("total_gold", 0)
-                stats["gold_per_min"] += player.get("gold_per_min", 0)
-                stats["gold_share"] += player.get("gold_share", 0)
-                stats["damage_per_gold"] += player.get("damage_per_gold", 0)
-                stats["level"] += player.get("level", 0)
-
-                # 게임 시간 합산 (분 단위)
-                game_time_str = match.get("game_time", "0:00")
-                try:
-                    parts = game_time_str.split(":")
-                    if len(parts) == 2:
-                        minutes = int(parts[0]) + int(parts[1]) / 60
-                        stats["total_game_time"] += minutes
-                except:
-                    pass
-
-                if match["result"] == "승리":
-                    stats["wins"] += 1
-                else:
-                    stats["losses"] += 1
-
-    # 플레이어별 통계 (team1, team2 모두에서 팀 선수 검색)
-    player_stats = {}
-    for match in filtered:
-        is_win = match["result"] == "승리"
+PERIOD_USAGE = "기간: `전체`, `주간`, `월간`, `시즌`, 최근 일수(예: `14`), `2025-01-01`, `2025-01-01~2025-01-31`"
+
+# ==========================================
+# 이미지 분석 작업 큐
+# ==========================================
+def start_parse_workers():
+    """워커 시작 (on_ready가 재연결 때마다 불려도 한 번만 시작)"""
+    if parse_workers:
+        return
+    resumed = parse_queue.reset_running()
+    removed = parse_queue.delete_finished()
+    if resumed or removed:
+        print(f"[분석 큐] 중단된 작업 {resumed}개 재개, 오래된 작업 {removed}개 정리")
+    for worker_id in range(PARSE_WORKERS):
+        parse_workers.append(asyncio.create_task(parse_worker(worker_id)))
+    parse_wakeup.set()
+
+async def parse_worker(worker_id: int):
+    """대기열에서 작업을 하나씩 꺼내 처리 (작업이 없으면 다음 재시도 시각이나 새 작업까지 대기)"""
+    while True:
+        parse_wakeup.clear()
+        job = parse_queue.claim()
+        if job is None:
+            try:
+                await asyncio.wait_for(parse_wakeup.wait(), timeout=parse_queue.seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await run_parse_job(job)
+        except Exception as e:
+            # 디스코드 전송 실패 등으로 워커가 죽지 않도록
+            print(f"[분석 큐] 워커 {worker_id} 작업 #{job['id']} 처리 중 오류: {e}")
+
+async def run_parse_job(job: dict):
+    """작업 1개 실행: 분석 → 성공하면 미리보기 전송, 실패하면 재시도 예약 또는 실패 알림"""
+    error = "이미지 분석 실패"
+    try:
+        image = job["image"]
+        if image is None:
+            image = await download_image_bytes(job["image_url"])
+        parsed_data = await parse_game_image(image, job["mime_type"] or "image/png")
+    except Exception as e:
+        parsed_data = None
+        error = str(e)
+
+    if parsed_data is None:
+        if job["attempts"] < PARSE_MAX_ATTEMPTS:
+            delay = PARSE_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+            parse_queue.retry(job["id"], error, delay)
+            print(f"[분석 큐] 작업 #{job['id']} 실패 ({job['attempts']}회), {delay}초 뒤 재시도")
+            return
+        parse_queue.fail(job["id"], error)
+        print(f"[분석 큐] 작업 #{job['id']} 최종 실패: {error}")
+        if job["batch_id"]:
+            await update_batch(job)
+            return
+        await send_job_message(job, content="❌ 이미지 분석에 실패했습니다. 다시 시도해주세요.")
+        return
+
+    parse_queue.complete(job["id"], parsed_data)
+    if job["batch_id"]:
+        await update_batch(job)
+        return
+
+    # 미리보기 임베드 생성
+    preview_embed = create_preview_embed(parsed_data)
+    view = ImageConfirmView(parsed_data, job["author_id"])
+    await send_job_message(job, content=None, embed=preview_embed, view=view)
 
-        # 게임 시간 파싱
-        game_time_str = match.get("game_time", "0:00")
-        game_minutes = 0
+    # 명령어 메시지는 분석이 끝난 뒤 삭제 (먼저 지우면 첨부 이미지 URL이 사라짐)
+    if job["message_id"]:
+        channel = await get_job_channel(job)
         try:
-            parts = game_time_str.split(":")
-            if len(parts) == 2:
-                game_minutes = int(parts[0]) + int(parts[1]) / 60
-        except:
+            await channel.get_partial_message(job["message_id"]).delete()
+        except discord.HTTPException:
             pass
 
-        # team1과 team2 모두 확인
-        for team_key in ["team1", "team2"]:
-            team = match.get(team_key, {})
-            for player in team.get("players", []):
-                nickname = player.get("nickname", "알 수 없음")
-                if nickname == "알 수 없음":
-                    continue
-
-                # 등록된 팀 선수인지 확인 (TEAM_PLAYER_NAMES가 있는 경우)
-                if TEAM_PLAYER_NAMES and nickname not in TEAM_PLAYER_NAMES:
-                    continue
-
-                if nickname not in player_stats:
-                    player_stats[nickname] = {
-                        "games": 0, "wins": 0, "losses": 0,
-                        "kills": 0, "deaths": 0, "assists": 0,
-                        "damage": 0, "gold": 0, "gold_per_min": 0,
-                        "gold_share": 0, "damage_per_gold": 0,
-                        "level": 0, "total_game_time": 0
-                    }
-                ps = player_stats[nickname]
-                ps["games"] += 1
-                ps["kills"] += player.get("kills", 0)
-                ps["deaths"] += player.get("deaths", 0)
-                ps["assists"] += player.get("assists", 0)
-                ps["damage"] += player.get("damage", 0)
-                ps["gold"] += player.get("total_gold", 0)
-                ps["gold_per_min"] += player.get("gold_per_min", 0)
-                ps["gold_share"] += player.get("gold_share", 0)
-                ps["damage_per_gold"] += player.get("damage_per_gold", 0)
-                ps["level"] += player.get("level", 0)
-                ps["total_game_time"] += game_minutes
-
-                # 승패 적용: team1 기준으로 판단
-                if team_key == "team1":
-                    if is_win:
-                        ps["wins"] += 1
-                    else:
-                        ps["losses"] += 1
-                else:  # team2
-                    if is_win:
-                        ps["losses"] += 1
-                    else:
-                        ps["wins"] += 1
+async def update_batch(job: dict):
+    """묶음 작업 1개가 끝날 때마다 진행 상황 표시, 모두 끝나면 일괄 확인 View 전송"""
+    lock = batch_locks.setdefault(job["batch_id"], asyncio.Lock())
+    async with lock:
+        if job["batch_id"] not in batch_locks:
+            return  # 이미 다른 워커가 확인 View를 보냄
+        jobs = parse_queue.batch_jobs(job["batch_id"])
+        finished = [j for j in jobs if j["status"] in ("done", "failed")]
+        if len(finished) < len(jobs):
+            await send_job_message(job, content=f"🔄 이미지 분석 중... ({len(finished)}/{len(jobs)})")
+            return
 
-    return {
-        "total": total,
-        "wins": wins,
-        "losses": losses,
-        "win_rate": win_rate,
-        "champion_stats": champion_stats,
-        "player_stats": player_stats
-    }
+        del batch_locks[job["batch_id"]]
+        games = [j["result"] for j in jobs if j["status"] == "done"]
+        if not games:
+            await send_job_message(job, content="❌ 이미지 분석에 모두 실패했습니다. 다시 시도해주세요.")
+            return
+
+        view = BulkConfirmView(games, job["author_id"], failed=len(jobs) - len(games))
+        await send_job_message(job, content=None, embed=view.render(), view=view)
+
+    if job["message_id"]:
+        channel = await get_job_channel(job)
+        try:
+            await channel.get_partial_message(job["message_id"]).delete()
+        except discord.HTTPException:
+            pass
+
+async def get_job_channel(job: dict):
+    channel = bot.get_channel(job["channel_id"])
+    if channel is None:
+        channel = await bot.fetch_channel(job["channel_id"])
+    return channel
+
+async def send_job_message(job: dict, **kwargs):
+    """'분석 중' 메시지를 결과로 수정 (메시지가 없어졌으면 새로 전송)"""
+    channel = await get_job_channel(job)
+    if job["status_message_id"]:
+        try:
+            await channel.get_partial_message(job["status_message_id"]).edit(**kwargs)
+            return
+        except discord.HTTPException:
+            pass
+    if kwargs.get("content") is None:
+        kwargs["content"] = f"<@{job['author_id']}>"
+    await channel.send(**{k: v for k, v in kwargs.items() if v is not None})
 
 # ==========================================
 # 명령어
@@ -514,15 +671,23 @@ def calculate_stats(matches: list, period: str = "all") -> dict:
 @bot.event
 async def on_ready():
     print(f'스크림 결과 봇 로그인 성공: {bot.user}')
+    start_parse_workers()
 
 @bot.command(name="register")
 @has_admin_role()
-async def register_match(ctx):
+async def register_match(ctx, recent: int = 0):
     """
     스크림 결과를 이미지로 등록합니다.
-    사용법: !등록 (이미지 첨부)
+    사용법: !등록 (이미지 첨부, 여러 장 가능) / !등록 [최근 메시지 수] (채널의 최근 메시지에 올라온 스크린샷 일괄 등록)
     """
-    if not ctx.message.attachments:
+    # 첨부 이미지 수집 (최근 메시지는 오래된 것부터 → 경기 순서대로)
+    attachments = list(ctx.message.attachments)
+    if recent > 0:
+        history = [m async for m in ctx.channel.history(limit=min(recent, 50), before=ctx.message)]
+        for message in reversed(history):
+            attachments.extend(message.attachments)
+
+    if not attachments:
         embed = discord.Embed(
             title="📸 이미지를 첨부해주세요",
             description="게임 결과 스크린샷과 함께 `!등록` 명령어를 사용해주세요.",
@@ -530,36 +695,40 @@ async def register_match(ctx):
         )
         embed.add_field(
             name="사용 방법",
-            value="1. 게임 종료 후 결과 화면 캡처\n2. 디스코드에서 `!등록` 입력\n3. 스크린샷 이미지 첨부\n4. 전송",
+            value="1. 게임 종료 후 결과 화면 캡처\n2. 디스코드에서 `!등록` 입력\n3. 스크린샷 이미지 첨부 (여러 장 가능)\n4. 전송\n\n"
+                  "이미 올린 스크린샷은 `!등록 [최근 메시지 수]`로 한 번에 등록할 수 있습니다.",
             inline=False
         )
         await ctx.send(embed=embed, delete_after=15)
         return
 
-    attachment = ctx.message.attachments[0]
-    if not attachment.content_type or not attachment.content_type.startswith('image/'):
+    images = [a for a in attachments if a.content_type and a.content_type.startswith('image/')]
+    if not images:
         await ctx.send("❌ 이미지 파일만 첨부 가능합니다.", delete_after=10)
         return
+    if len(images) > BULK_MAX_IMAGES:
+        await ctx.send(f"❌ 한 번에 최대 {BULK_MAX_IMAGES}장까지 등록할 수 있습니다.", delete_after=10)
+        return
 
-    # 분석 중 메시지
-    processing_msg = await ctx.send("🔄 이미지 분석 중... (잠시만 기다려주세요)")
-
-    try:
-        parsed_data = await parse_game_image(attachment.url)
-
-        if parsed_data is None:
-            await processing_msg.edit(content="❌ 이미지 분석에 실패했습니다. 다시 시도해주세요.")
-            return
-
-        # 미리보기 임베드 생성
-        preview_embed = create_preview_embed(parsed_data)
-        view = ImageConfirmView(parsed_data, ctx.author.id)
-
-        await processing_msg.edit(content=None, embed=preview_embed, view=view)
-        await ctx.message.delete()
-
-    except Exception as e:
-        await processing_msg.edit(content=f"❌ 이미지 분석 중 오류 발생: {str(e)}")
+    # 분석 중 메시지 (분석은 대기열의 워커가 처리하고, 끝나면 이 메시지를 미리보기로 수정)
+    waiting = parse_queue.pending_count()
+    status = "🔄 이미지 분석 중... (잠시만 기다려주세요)"
+    if len(images) > 1:
+        status = f"🔄 이미지 분석 중... (0/{len(images)})"
+    if waiting:
+        status += f" - 앞에 {waiting}건 대기 중"
+    processing_msg = await ctx.send(status)
+
+    # 여러 장이면 상태 메시지 ID로 묶어 전부 끝난 뒤 한 번에 확인
+    batch_id = processing_msg.id if len(images) > 1 else None
+    for attachment in images:
+        # 첨부 파일 바이트를 바로 읽어 큐에 저장 (URL을 다시 내려받지 않음)
+        parse_queue.enqueue(
+            ctx.channel.id, ctx.author.id, attachment.url,
+            message_id=ctx.message.id, status_message_id=processing_msg.id, batch_id=batch_id,
+            image=await attachment.read(), mime_type=attachment.content_type.split(";")[0]
+        )
+    parse_wakeup.set()
 
 @bot.command(name="champion")
 @has_admin_role()
@@ -568,13 +737,13 @@ async def champion_stats_cmd(ctx):
     포지션별 챔피언 통계를 조회합니다.
     사용법: !챔피언통계
     """
-    data = load_data()
-    if not data["matches"]:
+    aggregates = load_aggregates()
+    stats = aggregates.to_stats(TEAM_PLAYER_NAMES)
+    if not stats:
         await ctx.send("📊 아직 등록된 경기 기록이 없습니다.")
         return
 
-    stats = calculate_stats(data["matches"], "all")
-    if not stats or not stats["champion_stats"]:
+    if not stats["champion_stats"]:
         await ctx.send("📊 챔피언 기록이 없습니다.")
         return
 
@@ -627,64 +796,7 @@ async def champion_stats_cmd(ctx):
 
     # 식스맨 선수의 챔피언 통계 수집
     sixman_players = position_players.get("식스맨", [])
-    sixman_champs = {}
-
-    if sixman_players:
-        for match in data["matches"]:
-            is_win = match["result"] == "승리"
-
-            # 게임 시간 파싱
-            game_time_str = match.get("game_time", "0:00")
-            game_minutes = 0
-            try:
-                parts = game_time_str.split(":")
-                if len(parts) == 2:
-                    game_minutes = int(parts[0]) + int(parts[1]) / 60
-            except:
-                pass
-
-            for team_key in ["team1", "team2"]:
-                team = match.get(team_key, {})
-                for player in team.get("players", []):
-                    nickname = player.get("nickname", "")
-                    if nickname in sixman_players:
-                        champ = player.get("champion", "알 수 없음")
-                        if champ == "알 수 없음":
-                            continue
-
-                        if champ not in sixman_champs:
-                            sixman_champs[champ] = {
-                                "champion": champ,
-                                "games": 0, "wins": 0, "losses": 0,
-                                "kills": 0, "deaths": 0, "assists": 0,
-                                "level": 0, "gold": 0, "gold_per_min": 0,
-                                "damage": 0, "gold_share": 0, "damage_per_gold": 0,
-                                "total_game_time": 0
-                            }
-
-                        sc = sixman_champs[champ]
-                        sc["games"] += 1
-                        sc["kills"] += player.get("kills", 0)
-                        sc["deaths"] += player.get("deaths", 0)
-                        sc["assists"] += player.get("assists", 0)
-                        sc["level"] += player.get("level", 0)
-                        sc["gold"] += player.get("total_gold", 0)
-                        sc["gold_per_min"] += player.get("gold_per_min", 0)
-                        sc["damage"] += player.get("damage", 0)
-                        sc["gold_share"] += player.get("gold_share", 0)
-                        sc["damage_per_gold"] += player.get("damage_per_gold", 0)
-                        sc["total_game_time"] += game_minutes
-
-                        if team_key == "team1":
-                            if is_win:
-                                sc["wins"] += 1
-                            else:
-                                sc["losses"] += 1
-                        else:
-                            if is_win:
-                                sc["losses"] += 1
-                            else:
-                                sc["wins"] += 1
+    sixman_champs = aggregates.champions_of(sixman_players)
 
     for position in ["탑", "정글", "미드", "원딜", "서폿"]:
         if position in by_position:
@@ -790,18 +902,23 @@ async def champion_stats_cmd(ctx):
 
 @bot.command(name="player")
 @has_admin_role()
-async def player_stats_cmd(ctx):
+async def player_stats_cmd(ctx, *, period: str = "all"):
     """
     선수별 통계를 조회합니다.
-    사용법: !선수통계
+    사용법: !선수통계 [기간]
     """
-    data = load_data()
-    if not data["matches"]:
-        await ctx.send("📊 아직 등록된 경기 기록이 없습니다.")
+    parsed_period = parse_period(period)
+    if parsed_period is None:
+        await ctx.send(f"❌ 기간 형식이 올바르지 않습니다.\n{PERIOD_USAGE}", delete_after=15)
         return
+    start, end, period_label = parsed_period
 
-    stats = calculate_stats(data["matches"], "all")
-    if not stats or not stats["player_stats"]:
+    stats = load_period_stats(start, end).to_stats(TEAM_PLAYER_NAMES)
+    if not stats:
+        await ctx.send(f"📊 {period_label} 기간에 등록된 경기 기록이 없습니다.")
+        return
+
+    if not stats["player_stats"]:
         await ctx.send("📊 선수 기록이 없습니다.")
         return
 
@@ -938,6 +1055,8 @@ async def player_stats_cmd(ctx):
         inline=False
     )
 
+    embed.set_footer(text=f"기간: {period_label}")
+
     await ctx.send(embed=embed)
 
 @bot.command(name="recent")
@@ -1009,65 +1128,50 @@ async def match_detail(ctx, index: int = 1):
 
 @bot.command(name="team")
 @has_admin_role()
-async def team_stats_cmd(ctx):
+async def team_stats_cmd(ctx, *, period: str = "all"):
     """
-    팀 전체 통계를 조회합니다 (기간 제한 없음).
-    사용법: !팀통계
+    팀 전체 통계를 조회합니다.
+    사용법: !팀통계 [기간]
     """
-    data = load_data()
-    matches = data.get("matches", [])
+    parsed_period = parse_period(period)
+    if parsed_period is None:
+        await ctx.send(f"❌ 기간 형식이 올바르지 않습니다.\n{PERIOD_USAGE}", delete_after=15)
+        return
+    start, end, period_label = parsed_period
 
-    if not matches:
-        await ctx.send("📊 아직 등록된 경기 기록이 없습니다.")
+    stats = load_period_stats(start, end)
+    team = stats.team
+    total_games = team["games"]
+
+    if not total_games:
+        await ctx.send(f"📊 {period_label} 기간에 등록된 경기 기록이 없습니다.")
         return
 
     # 기본 통계
-    total_games = len(matches)
-    wins = sum(1 for m in matches if m["result"] == "승리")
+    wins = team["wins"]
     losses = total_games - wins
     win_rate = (wins / total_games * 100) if total_games > 0 else 0
 
     # 진영별 통계
-    blue_games = [m for m in matches if m.get("side") == "blue"]
-    red_games = [m for m in matches if m.get("side") == "red"]
-
-    blue_wins = sum(1 for m in blue_games if m["result"] == "승리")
-    red_wins = sum(1 for m in red_games if m["result"] == "승리")
+    blue_wins = team["side_wins"]["blue"]
+    red_wins = team["side_wins"]["red"]
 
-    blue_total = len(blue_games)
-    red_total = len(red_games)
+    blue_total = team["side_games"]["blue"]
+    red_total = team["side_games"]["red"]
 
     blue_win_rate = (blue_wins / blue_total * 100) if blue_total > 0 else 0
     red_win_rate = (red_wins / red_total * 100) if red_total > 0 else 0
 
     # 게임 시간 통계
-    game_times = []
-    for m in matches:
-        game_time_str = m.get("game_time", "0:00")
-        try:
-            parts = game_time_str.split(":")
-            if len(parts) == 2:
-                minutes = int(parts[0]) + int(parts[1]) / 60
-                game_times.append(minutes)
-        except (ValueError, AttributeError):
-            pass
-
-    avg_game_time = sum(game_times) / len(game_times) if game_times else 0
-    min_game_time = min(game_times) if game_times else 0
-    max_game_time = max(game_times) if game_times else 0
+    avg_game_time = team["time_sum"] / team["timed_games"] if team["timed_games"] else 0
+    min_game_time = team["time_min"] or 0
+    max_game_time = team["time_max"] or 0
 
     # 팀 평균 KDA, 골드
-    total_kills = 0
-    total_deaths = 0
-    total_assists = 0
-    total_gold = 0
-
-    for m in matches:
-        team1 = m.get("team1", {})
-        total_kills += team1.get("total_kills", 0)
-        total_deaths += team1.get("total_deaths", 0)
-        total_assists += team1.get("total_assists", 0)
-        total_gold += team1.get("team_total_gold", 0)
+    total_kills = team["kills"]
+    total_deaths = team["deaths"]
+    total_assists = team["assists"]
+    total_gold = team["gold"]
 
     avg_kills = total_kills / total_games if total_games > 0 else 0
     avg_deaths = total_deaths / total_games if total_games > 0 else 0
@@ -1076,40 +1180,10 @@ async def team_stats_cmd(ctx):
     team_kda = (total_kills + total_assists) / max(total_deaths, 1)
 
     # 연승/연패 기록
-    current_streak = 0
-    streak_type = None
-    max_win_streak = 0
-    max_lose_streak = 0
-    temp_streak = 0
-    prev_result = None
-
-    for m in matches:
-        result = m["result"]
-        if result == prev_result:
-            temp_streak += 1
-        else:
-            if prev_result == "승리":
-                max_win_streak = max(max_win_streak, temp_streak)
-            elif prev_result == "패배":
-                max_lose_streak = max(max_lose_streak, temp_streak)
-            temp_streak = 1
-            prev_result = result
-
-    # 마지막 스트릭 처리
-    if prev_result == "승리":
-        max_win_streak = max(max_win_streak, temp_streak)
-    elif prev_result == "패배":
-        max_lose_streak = max(max_lose_streak, temp_streak)
-
-    # 현재 연승/연패
-    for m in reversed(matches):
-        if streak_type is None:
-            streak_type = m["result"]
-            current_streak = 1
-        elif m["result"] == streak_type:
-            current_streak += 1
-        else:
-            break
+    max_win_streak = stats.max_win_streak
+    max_lose_streak = stats.max_lose_streak
+    current_streak = stats.streak
+    streak_type = "승리" if stats.streak_result else "패배"
 
     # 임베드 생성
     if win_rate >= 60:
@@ -1132,7 +1206,8 @@ async def team_stats_cmd(ctx):
     overall += f"📈 승률: {win_rate:.1f}%\n"
     overall += f"```"
 
-    embed.add_field(name="📊 전체 성적", value=overall, inline=False)
+    overall_name = "📊 전체 성적" if start is None and end is None else f"📊 성적 ({period_label})"
+    embed.add_field(name=overall_name, value=overall, inline=False)
 
     # 진영별 승률
     side_stats = f"```\n"
@@ -1217,13 +1292,13 @@ async def help_command(ctx):
         inline=False
     )
     embed.add_field(
-        name="!player",
-        value="선수별 통계를 조회합니다.",
+        name="!player [기간]",
+        value="선수별 통계를 조회합니다. (기간: 전체 / 주간 / 월간 / 시즌 / 최근 일수 / 2025-01-01~2025-01-31)",
         inline=False
     )
     embed.add_field(
-        name="!team",
-        value="팀 전체 통계를 조회합니다.",
+        name="!team [기간]",
+        value="팀 전체 통계를 조회합니다. (기간은 !player와 동일)",
         inline=False
     )
 
@@ -1,17 +1,22 @@
-
 # haze_yum.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import aiohttp
+import asyncio
 import ssl
 import certifi
 import os
 import json
 import time
-from datetime import datetime
-from collections import Counter
 from dotenv import load_dotenv
 from google import genai
+from riot_client import RiotClient
+from match_store import MatchStore
+from player_cache import PlayerCache
+from llm_cache import LLMCache, make_key
+import timeline_engine
+import match_table
+from match_table import MatchTable
 
 # SSL 컨텍스트 생성
 ssl_context = ssl.create_default_context(cafile=certifi.where())
@@ -26,40 +31,41 @@ RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 ADMIN_ROLE_ID = int(os.getenv("ADMIN_ROLE_ID", "0"))
 YUM_CHANNEL_ID = int(os.getenv("YUM_CHANNEL_ID", "0"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# 테스트 모드: 로컬 가짜 Riot 서버 주소 (예: http://127.0.0.1:8089/{routing})
+RIOT_API_BASE_URL = os.getenv("RIOT_API_BASE_URL")
 
 # Gemini 클라이언트
 gemini_client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+GEMINI_MODEL = "gemini-2.0-flash"
+AI_STREAM_EDIT_SECONDS = 1.0  # AI 분석 스트리밍 중 메시지 수정 최소 간격 (Discord 수정 제한 고려)
+
+# Gemini 응답 캐시 (같은 모델 + 프롬프트면 API를 다시 호출하지 않음)
+llm_cache = LLMCache()
 
 # 지역 설정 (한국)
 REGION = "kr"
 REGION_V5 = "asia"  # account-v1, match-v5 API용
 
+# 매치 상세/타임라인 동시 요청 수 제한
+MATCH_FETCH_CONCURRENCY = int(os.getenv("MATCH_FETCH_CONCURRENCY", "8"))
+MATCH_COUNT = 20  # 분석할 최근 게임 수
+TIMELINE_COUNT = 5  # 타임라인을 분석할 최근 게임 수 (API 제한 고려)
+
 # ==========================================
 # 캐시 설정
 # ==========================================
-CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "player_cache.json")
-CACHE_EXPIRY_DAYS = 7
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "player_cache.json")  # 이전 JSON 캐시 (마이그레이션용)
+CACHE_DB_FILE = "player_cache.db"  # 실행 위치 기준 (onefile 빌드의 임시 폴더에 두면 재시작마다 사라짐)
+# soft TTL 이내: 캐시 그대로 사용
+# soft ~ hard TTL: 오래된 캐시를 바로 보여주고 백그라운드에서 갱신 (stale-while-revalidate)
+# hard TTL 초과: 캐시 미스
+CACHE_EXPIRY_DAYS = float(os.getenv("CACHE_SOFT_TTL_DAYS", "7"))
 CACHE_EXPIRY_SECONDS = CACHE_EXPIRY_DAYS * 24 * 60 * 60  # 7일 = 604800초
+CACHE_HARD_EXPIRY_DAYS = float(os.getenv("CACHE_HARD_TTL_DAYS", "30"))
+CACHE_HARD_EXPIRY_SECONDS = max(CACHE_HARD_EXPIRY_DAYS * 24 * 60 * 60, CACHE_EXPIRY_SECONDS)
 
-def load_cache() -> dict:
-    """캐시 파일 로드"""
-    if not os.path.exists(CACHE_FILE):
-        return {}
-    try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"[캐시] 로드 오류: {e}")
-        return {}
-
-
-def save_cache(cache: dict) -> None:
-    """캐시 파일 저장"""
-    try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
-    except IOError as e:
-        print(f"[캐시] 저장 오류: {e}")
+# 디스크(SQLite) 캐시 + 메모리 LRU
+player_cache = PlayerCache(CACHE_DB_FILE, legacy_json_path=CACHE_FILE, expiry_seconds=CACHE_HARD_EXPIRY_SECONDS)
 
 
 def get_cache_key(riot_id: str) -> str:
@@ -67,81 +73,73 @@ def get_cache_key(riot_id: str) -> str:
     return riot_id.lower().strip()
 
 
-def get_cached_player(riot_id: str) -> tuple[dict | None, bool]:
+def get_cached_player(riot_id: str, allow_stale: bool = False) -> tuple[dict | None, bool, str | None, bool]:
     """
-    캐시에서 플레이어 데이터 조회
-    Returns: (data, is_cached) - data가 None이면 캐시 미스, is_cached는 캐시 사용 여부
+    캐시에서 플레이어 데이터와 AI 분석을 한 번에 조회
+    allow_stale이면 soft TTL이 지난 항목도 hard TTL 전까지는 반환
+    Returns: (data, is_cached, ai_analysis, is_stale) - data가 None이면 캐시 미스, is_cached는 캐시 사용 여부
     """
-    cache = load_cache()
-    key = get_cache_key(riot_id)
-
-    if key not in cache:
-        return None, False
-
-    entry = cache[key]
-    cached_time = entry.get("cached_at", 0)
-    current_time = time.time()
-
-    # 7일 경과 체크
-    if current_time - cached_time > CACHE_EXPIRY_SECONDS:
-        print(f"[캐시] {riot_id} - 만료됨 (7일 초과)")
-        return None, False
-
-    remaining_days = (CACHE_EXPIRY_SECONDS - (current_time - cached_time)) / 86400
+    entry = player_cache.get(get_cache_key(riot_id))
+    if entry is None:
+        return None, False, None, False
+
+    cached_time, data, ai_analysis = entry
+    age = time.time() - cached_time
+
+    # hard TTL 경과 체크
+    if age > CACHE_HARD_EXPIRY_SECONDS:
+        print(f"[캐시] {riot_id} - 만료됨 ({CACHE_HARD_EXPIRY_DAYS:g}일 초과)")
+        return None, False, None, False
+
+    # soft TTL 경과 체크
+    if age > CACHE_EXPIRY_SECONDS:
+        if not allow_stale:
+            print(f"[캐시] {riot_id} - 만료됨 ({CACHE_EXPIRY_DAYS:g}일 초과)")
+            return None, False, None, False
+        print(f"[캐시] {riot_id} - 오래된 캐시 사용 ({age / 86400:.1f}일 전), 백그라운드 갱신 예정")
+        return expand_player_data(data), True, ai_analysis, True
+
+    remaining_days = (CACHE_EXPIRY_SECONDS - age) / 86400
     print(f"[캐시] {riot_id} - 히트! (남은 기간: {remaining_days:.1f}일)")
-    return entry.get("data"), True
+    return expand_player_data(data), True, ai_analysis, False
 
 
 def set_cached_player(riot_id: str, data: dict, ai_analysis: str | None = None) -> None:
-    """플레이어 데이터를 캐시에 저장"""
-    cache = load_cache()
-    key = get_cache_key(riot_id)
-
-    cache[key] = {
-        "cached_at": time.time(),
-        "cached_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "data": data,
-        "ai_analysis": ai_analysis
-    }
-
-    save_cache(cache)
+    """플레이어 데이터를 캐시에 저장 (기본 정보 + 매치 테이블만)"""
+    player_cache.set(get_cache_key(riot_id), compact_player_data(data), ai_analysis)
     print(f"[캐시] {riot_id} - 저장 완료")
 
 
-def get_cached_ai_analysis(riot_id: str) -> str | None:
-    """캐시된 AI 분석 결과 조회"""
-    cache = load_cache()
-    key = get_cache_key(riot_id)
-
-    if key in cache:
-        return cache[key].get("ai_analysis")
-    return None
+CACHE_CLEANUP_INTERVAL = 60 * 60  # 만료 항목 정리 주기 (1시간)
+_last_cache_cleanup = 0.0
 
 
 def clear_expired_cache() -> int:
-    """만료된 캐시 항목 정리"""
-    cache = load_cache()
-    current_time = time.time()
-
-    expired_keys = [
-        key for key, entry in cache.items()
-        if current_time - entry.get("cached_at", 0) > CACHE_EXPIRY_SECONDS
-    ]
-
-    for key in expired_keys:
-        del cache[key]
-
-    if expired_keys:
-        save_cache(cache)
-        print(f"[캐시] 만료된 항목 {len(expired_keys)}개 정리됨")
-
-    return len(expired_keys)
+    """만료된 캐시 항목 정리 (명령어마다 디스크를 건드리지 않도록 1시간에 한 번만 실행)"""
+    global _last_cache_cleanup
+    now = time.time()
+    if now - _last_cache_cleanup < CACHE_CLEANUP_INTERVAL:
+        return 0
+    _last_cache_cleanup = now
+
+    removed = player_cache.delete_older_than(now - CACHE_HARD_EXPIRY_SECONDS)
+    if removed:
+        print(f"[캐시] 만료된 항목 {removed}개 정리됨")
+    return removed
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True  # 역할 확인을 위해 필요
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+class YumBot(commands.Bot):
+    async def close(self):
+        # 봇 종료 시 Riot 커넥션 풀 정리
+        await close_riot_client()
+        await super().close()
+
+
+bot = YumBot(command_prefix="!", intents=intents)
 
 def has_admin_role():
     """ADMIN_ROLE_ID 권한 체크 + 채널 체크 데코레이터"""
@@ -161,482 +159,419 @@ def has_admin_role():
 # ==========================================
 # Riot API 헬퍼 함수
 # ==========================================
+# 공용 Riot 클라이언트 (on_ready에서 생성, 봇 종료 시 정리)
+riot_client: RiotClient | None = None
+
+# 매치/타임라인 영구 저장소 (match_id는 불변이므로 한 번 받은 매치는 다시 요청하지 않음)
+match_store = MatchStore()
+
+
+def get_riot_client() -> RiotClient:
+    """공용 Riot 클라이언트 조회 (아직 없으면 생성)"""
+    global riot_client
+    if riot_client is None:
+        riot_client = RiotClient(RIOT_API_KEY, ssl_context, base_url=RIOT_API_BASE_URL)
+    return riot_client
+
+
+async def close_riot_client() -> None:
+    """공용 Riot 클라이언트 종료"""
+    global riot_client
+    if riot_client is not None:
+        await riot_client.close()
+        riot_client = None
+
+
 async def get_account_by_riot_id(game_name: str, tag_line: str) -> dict | None:
     """Riot ID (게임이름#태그)로 계정 정보 조회"""
-    url = f"https://{REGION_V5}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    _, data = await get_riot_client().get(
+        REGION_V5, f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}", method="account-v1.getByRiotId"
+    )
+    return data
 
 
 async def get_summoner_by_puuid(puuid: str) -> dict | None:
     """PUUID로 소환사 정보 조회"""
-    url = f"https://{REGION}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    _, data = await get_riot_client().get(
+        REGION, f"/lol/summoner/v4/summoners/by-puuid/{puuid}", method="summoner-v4.getByPUUID"
+    )
+    return data
 
 
 async def get_league_entries(puuid: str) -> list:
     """소환사의 랭크 정보 조회 (PUUID 사용)"""
-    url = f"https://{REGION}.api.riotgames.com/lol/league/v4/entries/by-puuid/{puuid}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return []
+    _, data = await get_riot_client().get(
+        REGION, f"/lol/league/v4/entries/by-puuid/{puuid}", method="league-v4.getLeagueEntriesByPUUID"
+    )
+    return data if data is not None else []
 
 
 async def get_champion_mastery(puuid: str, count: int = 3) -> list:
     """챔피언 숙련도 상위 조회"""
-    url = f"https://{REGION}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count={count}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return []
+    _, data = await get_riot_client().get(
+        REGION, f"/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top", params={"count": count},
+        method="champion-mastery-v4.getTopChampionMasteriesByPUUID"
+    )
+    return data if data is not None else []
 
 
 async def get_recent_matches(puuid: str, count: int = 20, queue_type: str = "ranked") -> list:
     """최근 매치 ID 조회"""
+    params = {"start": 0, "count": count}
     if queue_type == "ranked":
-        url = f"https://{REGION_V5}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}&type=ranked"
-    else:
-        url = f"https://{REGION_V5}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
+        params["type"] = "ranked"
+    _, data = await get_riot_client().get(
+        REGION_V5, f"/lol/match/v5/matches/by-puuid/{puuid}/ids", params=params,
+        method="match-v5.getMatchIdsByPUUID"
+    )
+    return data if data is not None else []
+
 
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return []
+async def fetch_match_payload(match_id: str, kind: str) -> dict | None:
+    """매치(kind="match") / 타임라인(kind="timeline")을 API에서 받아 매치 저장소에 저장"""
+    path = f"/lol/match/v5/matches/{match_id}" + ("/timeline" if kind == "timeline" else "")
+    method = "match-v5.getTimeline" if kind == "timeline" else "match-v5.getMatch"
+    _, data = await get_riot_client().get(REGION_V5, path, method=method)
+    if data is not None:
+        match_store.put(match_id, data, kind)
+    return data
 
 
 async def get_match_detail(match_id: str) -> dict | None:
-    """매치 상세 정보 조회"""
-    url = f"https://{REGION_V5}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    """매치 상세 정보 조회 (매치 저장소 우선, 같은 매치 동시 요청은 1회로 합침)"""
+    stored = match_store.get(match_id, "match")
+    if stored is not None:
+        return stored
+    return await single_flight(("match", match_id), lambda: fetch_match_payload(match_id, "match"))
 
 
 async def get_match_timeline(match_id: str) -> dict | None:
-    """매치 타임라인 조회 (Match-V5 Timeline)"""
-    url = f"https://{REGION_V5}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    """매치 타임라인 조회 (Match-V5 Timeline, 매치 저장소 우선, 같은 매치 동시 요청은 1회로 합침)"""
+    stored = match_store.get(match_id, "timeline")
+    if stored is not None:
+        return stored
+    return await single_flight(("timeline", match_id), lambda: fetch_match_payload(match_id, "timeline"))
 
 
 async def get_current_game(puuid: str) -> dict | None:
     """현재 진행 중인 게임 조회 (Spectator-V5)"""
-    url = f"https://{REGION}.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{puuid}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    _, data = await get_riot_client().get(
+        REGION, f"/lol/spectator/v5/active-games/by-summoner/{puuid}", method="spectator-v5.getCurrentGameInfoByPuuid"
+    )
+    return data
 
 
 async def get_player_challenges(puuid: str) -> dict | None:
     """플레이어 도전과제 정보 조회 (Challenges-V1)"""
-    url = f"https://{REGION}.api.riotgames.com/lol/challenges/v1/player-data/{puuid}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            return None
+    _, data = await get_riot_client().get(
+        REGION, f"/lol/challenges/v1/player-data/{puuid}", method="challenges-v1.getPlayerData"
+    )
+    return data
 
 
-# ==========================================
-# 챔피언 ID → 이름 매핑 (Data Dragon)
-# ==========================================
-CHAMPION_MAP = {}
+async def gather_limited(coros: list, limit: int = MATCH_FETCH_CONCURRENCY) -> list:
+    """코루틴들을 동시에 실행 (동시 실행 수 제한, 결과는 입력 순서 유지)"""
+    semaphore = asyncio.Semaphore(max(limit, 1))
 
+    async def run(coro):
+        async with semaphore:
+            return await coro
 
-async def load_champion_map():
-    """Data Dragon에서 챔피언 데이터 로드"""
-    global CHAMPION_MAP
-    url = "https://ddragon.leagueoflegends.com/cdn/14.24.1/data/ko_KR/champion.json"
+    return await asyncio.gather(*(run(coro) for coro in coros))
 
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                for champ_name, champ_data in data["data"].items():
-                    CHAMPION_MAP[int(champ_data["key"])] = champ_data["name"]
 
+# 진행 중인 요청 (single-flight): 키 → 공유 Task
+inflight_requests: dict[tuple, asyncio.Task] = {}
 
-def get_champion_name(champion_id: int) -> str:
-    return CHAMPION_MAP.get(champion_id, f"Unknown({champion_id})")
 
+async def single_flight(key: tuple, factory):
+    """
+    같은 키의 요청이 진행 중이면 새로 실행하지 않고 그 결과를 기다림
+    (한 호출자가 취소되어도 공유 작업은 취소되지 않음)
+    """
+    task = inflight_requests.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        inflight_requests[key] = task
 
-# ==========================================
-# 타임라인 분석 함수
-# ==========================================
-def analyze_timeline(timeline_data: dict, puuid: str, participant_id: int) -> dict:
-    """타임라인 데이터에서 상세 분석"""
-    analysis = {
-        "early_kills": 0,  # 10분 전 킬
-        "early_deaths": 0,  # 10분 전 데스
-        "early_assists": 0,  # 10분 전 어시스트
-        "first_blood_time": None,
-        "cs_at_10": 0,
-        "cs_at_15": 0,
-        "gold_at_10": 0,
-        "gold_at_15": 0,
-        "lane_kills": 0,  # 라인전 킬
-        "roam_kills": 0,  # 로밍 킬
-        "solo_kills": 0,  # 솔로킬
-        "ganks_received": 0,  # 갱 당한 횟수
-        "tower_plates": 0,  # 타워 플레이트
-        "jungle_invades": 0,  # 정글 침범
-    }
+        def cleanup(done_task):
+            if inflight_requests.get(key) is done_task:
+                del inflight_requests[key]
 
-    if not timeline_data or "info" not in timeline_data:
-        return analysis
+        task.add_done_callback(cleanup)
+    return await asyncio.shield(task)
 
-    frames = timeline_data["info"].get("frames", [])
 
-    for frame in frames:
-        timestamp_min = frame.get("timestamp", 0) // 60000  # 밀리초 -> 분
+# ==========================================
+# 챔피언 ID → 이름 매핑 (Data Dragon)
+# ==========================================
+# 디스크 캐시 (버전별 id→이름, ko_KR / en_US)
+CHAMPION_CACHE_FILE = "champion_cache.json"  # 실행 위치 기준 (onefile 빌드의 임시 폴더에 두면 재시작마다 사라짐)
+CHAMPION_LOCALES = ["ko_KR", "en_US"]
+CHAMPION_REVALIDATE_SECONDS = 6 * 60 * 60  # 최신 버전 확인 주기 (6시간)
+
+CHAMPION_MAP = {}  # ko_KR
+CHAMPION_MAP_EN = {}  # en_US
+champion_map_version = None
+champion_map_lock = asyncio.Lock()  # 동시에 여러 번 받지 않도록
+
+
+def load_champion_map() -> bool:
+    """디스크에 저장된 챔피언 데이터 로드 (네트워크 없이 즉시)"""
+    global champion_map_version
+    if not os.path.exists(CHAMPION_CACHE_FILE):
+        return False
+    try:
+        with open(CHAMPION_CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"[챔피언] 캐시 로드 오류: {e}")
+        return False
 
-        # 참가자 프레임 데이터
-        participant_frames = frame.get("participantFrames", {})
-        player_frame = participant_frames.get(str(participant_id), {})
+    for locale, target in (("ko_KR", CHAMPION_MAP), ("en_US", CHAMPION_MAP_EN)):
+        target.clear()
+        target.update({int(champ_id): name for champ_id, name in cached.get(locale, {}).items()})
+    champion_map_version = cached.get("version")
+    print(f"[챔피언] 캐시 로드 ({champion_map_version}, {len(CHAMPION_MAP)}개)")
+    return bool(CHAMPION_MAP)
 
-        if timestamp_min == 10:
-            analysis["cs_at_10"] = player_frame.get("minionsKilled", 0) + player_frame.get("jungleMinionsKilled", 0)
-            analysis["gold_at_10"] = player_frame.get("totalGold", 0)
-        elif timestamp_min == 15:
-            analysis["cs_at_15"] = player_frame.get("minionsKilled", 0) + player_frame.get("jungleMinionsKilled", 0)
-            analysis["gold_at_15"] = player_frame.get("totalGold", 0)
 
-        # 이벤트 분석
-        events = frame.get("events", [])
-        for event in events:
-            event_type = event.get("type")
-            event_time = event.get("timestamp", 0) // 60000
+def save_champion_map(version: str, maps: dict[str, dict[int, str]]) -> None:
+    """챔피언 데이터를 버전과 함께 디스크에 저장 (언어별 키)"""
+    try:
+        with open(CHAMPION_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": version, **maps}, f, ensure_ascii=False)
+    except IOError as e:
+        print(f"[챔피언] 캐시 저장 오류: {e}")
 
-            if event_type == "CHAMPION_KILL":
-                killer_id = event.get("killerId")
-                victim_id = event.get("victimId")
-                assisting_ids = event.get("assistingParticipantIds", [])
 
-                if event_time <= 10:
-                    if killer_id == participant_id:
-                        analysis["early_kills"] += 1
-                    if victim_id == participant_id:
-                        analysis["early_deaths"] += 1
-                    if participant_id in assisting_ids:
-                        analysis["early_assists"] += 1
+async def refresh_champion_map() -> None:
+    """
+    Data Dragon 최신 버전 확인 후 바뀌었을 때만 챔피언 데이터 다시 받기
+    (실패해도 기존 데이터 유지)
+    """
+    global champion_map_version
+    async with champion_map_lock:
+        try:
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
+                async with session.get("https://ddragon.leagueoflegends.com/api/versions.json") as resp:
+                    if resp.status != 200:
+                        return
+                    latest_version = (await resp.json())[0]
+
+                if latest_version == champion_map_version and CHAMPION_MAP and CHAMPION_MAP_EN:
+                    return
+
+                maps = {}
+                for locale in CHAMPION_LOCALES:
+                    url = f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/{locale}/champion.json"
+                    async with session.get(url) as resp:
+                        if resp.status != 200:
+                            return
+                        data = await resp.json()
+                    maps[locale] = {int(champ_data["key"]): champ_data["name"] for champ_data in data["data"].values()}
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+            print(f"[챔피언] 최신 데이터 확인 실패: {e}")
+            return
 
-                # 솔로킬 체크
-                if killer_id == participant_id and len(assisting_ids) == 0:
-                    analysis["solo_kills"] += 1
+        CHAMPION_MAP.clear()
+        CHAMPION_MAP.update(maps["ko_KR"])
+        CHAMPION_MAP_EN.clear()
+        CHAMPION_MAP_EN.update(maps["en_US"])
+        champion_map_version = latest_version
+        save_champion_map(latest_version, maps)
+        print(f"[챔피언] {latest_version} 데이터로 갱신 ({len(CHAMPION_MAP)}개)")
 
-            elif event_type == "TURRET_PLATE_DESTROYED":
-                if event.get("killerId") == participant_id:
-                    analysis["tower_plates"] += 1
 
-    return analysis
+@tasks.loop(seconds=CHAMPION_REVALIDATE_SECONDS)
+async def champion_refresh_loop():
+    """주기적으로 최신 버전 확인 (새 패치의 신규 챔피언 반영)"""
+    await refresh_champion_map()
 
 
-# ==========================================
-# 분석 함수
-# ==========================================
-async def analyze_player(riot_id: str, force_refresh: bool = False) -> tuple[dict | None, bool, str | None]:
+async def ensure_champion_map() -> bool:
     """
-    플레이어 분석 (닉네임#태그 형식)
-    Returns: (data, is_cached, cached_ai_analysis)
+    챔피언 데이터가 없으면(디스크 캐시도 없는 첫 실행) 받아올 때까지 대기
+    이름이 Unknown(id)인 채로 경기 기록이 캐시에 저장되지 않도록 분석 전에 호출
     """
-    # 캐시 확인 (강제 새로고침이 아닌 경우)
-    if not force_refresh:
-        cached_data, is_cached = get_cached_player(riot_id)
-        if cached_data is not None:
-            cached_ai = get_cached_ai_analysis(riot_id)
-            return cached_data, True, cached_ai
+    if not CHAMPION_MAP:
+        await refresh_champion_map()
+    return bool(CHAMPION_MAP)
 
-    # 닉네임 파싱
-    if "#" in riot_id:
-        game_name, tag_line = riot_id.rsplit("#", 1)
-    else:
-        game_name = riot_id
-        tag_line = "KR1"  # 기본 태그
 
-    # 계정 정보 조회
-    account = await get_account_by_riot_id(game_name, tag_line)
-    if not account:
-        return None, False, None
+def get_champion_name(champion_id: int, locale: str = "ko_KR") -> str:
+    champion_map = CHAMPION_MAP_EN if locale == "en_US" else CHAMPION_MAP
+    return champion_map.get(champion_id, f"Unknown({champion_id})")
 
-    puuid = account["puuid"]
 
-    # 소환사 정보 조회
-    summoner = await get_summoner_by_puuid(puuid)
-    if not summoner:
-        return None, False, None
+# ==========================================
+# 타임라인 분석 함수
+# ==========================================
+# 매치 저장소에 보관하는 참가자 10명 타임라인 지표 (엔진 버전별)
+TIMELINE_METRICS_KIND = f"timeline_metrics_v{timeline_engine.ENGINE_VERSION}"
 
-    # 랭크 정보 조회 (PUUID 사용)
-    leagues = await get_league_entries(puuid)
 
-    # 솔로랭크 정보 추출
-    solo_rank = None
-    flex_rank = None
-    for league in leagues:
-        if league["queueType"] == "RANKED_SOLO_5x5":
-            solo_rank = league
-        elif league["queueType"] == "RANKED_FLEX_SR":
-            flex_rank = league
+async def get_timeline_metrics(match_id: str) -> dict | None:
+    """
+    매치의 참가자 10명 타임라인 지표 조회 (매치 저장소 우선)
+    한 번 계산하면 같은 게임의 다른 선수를 분석할 때 타임라인을 다시 훑지 않음
+    Returns: {"참가자 ID": {지표: 값}} - 타임라인이 없으면 None
+    """
+    stored = match_store.get(match_id, TIMELINE_METRICS_KIND)
+    if stored is not None:
+        return stored
+
+    match_data, timeline_data = await asyncio.gather(get_match_detail(match_id), get_match_timeline(match_id))
+    if not timeline_data:
+        return None
+    metrics = {
+        str(pid): analysis
+        for pid, analysis in timeline_engine.analyze_all(timeline_data, match_data).items()
+    }
+    # 매치 정보 없이 계산하면 포지션을 몰라 라인/로밍 지표가 0이 되므로 저장하지 않음 (다음에 다시 계산)
+    if match_data:
+        match_store.put(match_id, metrics, TIMELINE_METRICS_KIND)
+    return metrics
 
-    # 챔피언 숙련도 상위 5 (전체 모스트)
-    masteries = await get_champion_mastery(puuid, 5)
+# ==========================================
+# 분석 함수
+# ==========================================
+# 합계(total_stats)에 더하는 매치 열 (match_entry 키와 동일)
+TOTAL_STAT_FIELDS = [
+    "turret_kills", "turret_takedowns", "dragon_kills", "baron_kills",
+    "double_kills", "triple_kills", "quadra_kills", "penta_kills",
+    "damage_to_objectives", "damage_self_mitigated", "total_damage_taken", "time_ccing_others",
+    "wards_placed", "wards_killed", "control_wards_placed",
+    "skillshots_dodged", "skillshots_hit",
+]
+
+# 합계(total_stats)에 더하는 타임라인 지표 (타임라인 엔진 결과 키와 동일)
+TIMELINE_SUM_FIELDS = ["lane_kills", "roam_kills", "ganks_received", "jungle_invades"]
+
+# 챔피언별 통계 (champion_stats 키 → 매치 열)
+CHAMPION_STAT_COLUMNS = {
+    "wins": "win", "kills": "kills", "deaths": "deaths", "assists": "assists",
+    "damage": "damage", "solo_kills": "solo_kills",
+}
+
+# 캐시에 그대로 저장하는 기본 정보 (나머지는 매치 테이블에서 다시 계산)
+BASE_FIELDS = [
+    "riot_id", "puuid", "summoner_level", "solo_rank", "flex_rank",
+    "top_champions", "challenges_data", "current_game",
+]
+
+
+def build_match_entry(match_id: str, match_data: dict, puuid: str) -> tuple[dict, int] | None:
+    """
+    매치 상세에서 해당 플레이어의 기록 추출
+    Returns: (match_entry, participant_id) - 플레이어가 없으면 None
+    """
+    participants = match_data["info"]["participants"]
 
-    # 도전과제 정보 조회 (Challenges-V1)
-    challenges_data = await get_player_challenges(puuid)
+    for idx, p in enumerate(participants):
+        if p["puuid"] != puuid:
+            continue
 
-    # 현재 게임 중인지 확인 (Spectator-V5)
-    current_game = await get_current_game(puuid)
+        champion_id = p["championId"]
+
+        # challenges 객체에서 추가 통계 추출
+        challenges = p.get("challenges", {})
+
+        # 매치 데이터 (임베드/AI 분석에서 읽는 필드만)
+        match_entry = {
+            "match_id": match_id,
+            "champion": get_champion_name(champion_id),
+            "win": p["win"],
+            "kills": p["kills"],
+            "deaths": p["deaths"],
+            "assists": p["assists"],
+            "damage": p["totalDamageDealtToChampions"],
+            "vision_score": p.get("visionScore", 0),
+            "position": p.get("teamPosition", "UNKNOWN"),
+            "turret_kills": p.get("turretKills", 0),
+            "turret_takedowns": p.get("turretTakedowns", 0),
+            "dragon_kills": p.get("dragonKills", 0),
+            "baron_kills": p.get("baronKills", 0),
+            "first_blood_kill": p.get("firstBloodKill", False),
+            "first_blood_assist": p.get("firstBloodAssist", False),
+            "double_kills": p.get("doubleKills", 0),
+            "triple_kills": p.get("tripleKills", 0),
+            "quadra_kills": p.get("quadraKills", 0),
+            "penta_kills": p.get("pentaKills", 0),
+            "damage_to_objectives": p.get("damageDealtToObjectives", 0),
+            "damage_self_mitigated": p.get("damageSelfMitigated", 0),
+            "total_damage_taken": p.get("totalDamageTaken", 0),
+            "time_ccing_others": p.get("timeCCingOthers", 0),
+            "wards_placed": p.get("wardsPlaced", 0),
+            "wards_killed": p.get("wardsKilled", 0),
+            "control_wards_placed": p.get("detectorWardsPlaced", 0),
+            # challenges 객체에서 추출
+            "skillshots_dodged": challenges.get("skillshotsDodged", 0),
+            "skillshots_hit": challenges.get("skillshotsHit", 0),
+            "solo_kills": challenges.get("soloKills", 0),
+            "damage_per_minute": challenges.get("damagePerMinute", 0),
+            "gold_per_minute": challenges.get("goldPerMinute", 0),
+            "kill_participation": challenges.get("killParticipation", 0),
+            "team_damage_percentage": challenges.get("teamDamagePercentage", 0),
+            # 타임라인 데이터
+            "timeline": {}
+        }
+        return match_entry, idx + 1
+    return None
 
-    # 최근 랭크 게임 매치 데이터 수집 (20게임)
-    match_ids = await get_recent_matches(puuid, 20)
-
-    wins = 0
-    losses = 0
-    recent_champions = []  # 최근 픽한 챔피언들
-    recent_matches_data = []  # 상세 매치 데이터
-
-    # 통계 집계용 변수
-    total_stats = {
-        "turret_kills": 0,
-        "turret_takedowns": 0,
-        "dragon_kills": 0,
-        "baron_kills": 0,
-        "first_blood_kills": 0,
-        "first_blood_assists": 0,
-        "double_kills": 0,
-        "triple_kills": 0,
-        "quadra_kills": 0,
-        "penta_kills": 0,
-        "damage_to_objectives": 0,
-        "damage_self_mitigated": 0,
-        "total_damage_taken": 0,
-        "time_ccing_others": 0,
-        "wards_placed": 0,
-        "wards_killed": 0,
-        "control_wards_placed": 0,
-        "skillshots_dodged": 0,
-        "skillshots_hit": 0,
-        "solo_kills": 0,
-        "early_kills": 0,
-        "early_deaths": 0,
-        "cs_at_10_total": 0,
-        "gold_at_10_total": 0,
-        "games_with_timeline": 0,
-    }
 
-    for match_id in match_ids[:20]:
-        match_data = await get_match_detail(match_id)
-        if match_data:
-            participants = match_data["info"]["participants"]
-            game_duration = match_data["info"]["gameDuration"]
-
-            for idx, p in enumerate(participants):
-                if p["puuid"] == puuid:
-                    participant_id = idx + 1
-                    is_win = p["win"]
-                    if is_win:
-                        wins += 1
-                    else:
-                        losses += 1
-
-                    champion_id = p["championId"]
-                    champion_name = get_champion_name(champion_id)
-                    recent_champions.append(champion_name)
-
-                    # challenges 객체에서 추가 통계 추출
-                    challenges = p.get("challenges", {})
-
-                    # 타임라인 분석 (처음 5게임만 - API 제한 고려)
-                    timeline_analysis = {}
-                    if len(recent_matches_data) < 5:
-                        timeline_data = await get_match_timeline(match_id)
-                        if timeline_data:
-                            timeline_analysis = analyze_timeline(timeline_data, puuid, participant_id)
-                            total_stats["games_with_timeline"] += 1
-                            total_stats["early_kills"] += timeline_analysis.get("early_kills", 0)
-                            total_stats["early_deaths"] += timeline_analysis.get("early_deaths", 0)
-                            total_stats["cs_at_10_total"] += timeline_analysis.get("cs_at_10", 0)
-                            total_stats["gold_at_10_total"] += timeline_analysis.get("gold_at_10", 0)
-                            total_stats["solo_kills"] += timeline_analysis.get("solo_kills", 0)
-
-                    # 상세 매치 데이터 저장 (모든 필드 포함)
-                    match_entry = {
-                        "champion": champion_name,
-                        "champion_id": champion_id,
-                        "win": is_win,
-                        "kills": p["kills"],
-                        "deaths": p["deaths"],
-                        "assists": p["assists"],
-                        "cs": p["totalMinionsKilled"] + p.get("neutralMinionsKilled", 0),
-                        "damage": p["totalDamageDealtToChampions"],
-                        "gold": p["goldEarned"],
-                        "vision_score": p.get("visionScore", 0),
-                        "position": p.get("teamPosition", "UNKNOWN"),
-                        "game_duration": game_duration,
-                        "kda": (p["kills"] + p["assists"]) / max(p["deaths"], 1),
-                        # 새로 추가된 필드들
-                        "turret_kills": p.get("turretKills", 0),
-                        "turret_takedowns": p.get("turretTakedowns", 0),
-                        "dragon_kills": p.get("dragonKills", 0),
-                        "baron_kills": p.get("baronKills", 0),
-                        "first_blood_kill": p.get("firstBloodKill", False),
-                        "first_blood_assist": p.get("firstBloodAssist", False),
-                        "double_kills": p.get("doubleKills", 0),
-                        "triple_kills": p.get("tripleKills", 0),
-                        "quadra_kills": p.get("quadraKills", 0),
-                        "penta_kills": p.get("pentaKills", 0),
-                        "damage_to_objectives": p.get("damageDealtToObjectives", 0),
-                        "damage_self_mitigated": p.get("damageSelfMitigated", 0),
-                        "total_damage_taken": p.get("totalDamageTaken", 0),
-                        "time_ccing_others": p.get("timeCCingOthers", 0),
-                        "wards_placed": p.get("wardsPlaced", 0),
-                        "wards_killed": p.get("wardsKilled", 0),
-                        "control_wards_placed": p.get("detectorWardsPlaced", 0),
-                        # challenges 객체에서 추출
-                        "skillshots_dodged": challenges.get("skillshotsDodged", 0),
-                        "skillshots_hit": challenges.get("skillshotsHit", 0),
-                        "solo_kills": challenges.get("soloKills", 0),
-                        "damage_per_minute": challenges.get("damagePerMinute", 0),
-                        "gold_per_minute": challenges.get("goldPerMinute", 0),
-                        "kda_challenge": challenges.get("kda", 0),
-                        "kill_participation": challenges.get("killParticipation", 0),
-                        "lane_minions_first_10": challenges.get("laneMinionsFirst10Minutes", 0),
-                        "turret_plates_taken": challenges.get("turretPlatesTaken", 0),
-                        "vision_score_per_minute": challenges.get("visionScorePerMinute", 0),
-                        "early_laning_phase_gold": challenges.get("earlyLaningPhaseGoldExpAdvantage", 0),
-                        "team_damage_percentage": challenges.get("teamDamagePercentage", 0),
-                        # 타임라인 데이터
-                        "timeline": timeline_analysis
-                    }
-                    recent_matches_data.append(match_entry)
-
-                    # 총계 집계
-                    total_stats["turret_kills"] += match_entry["turret_kills"]
-                    total_stats["turret_takedowns"] += match_entry["turret_takedowns"]
-                    total_stats["dragon_kills"] += match_entry["dragon_kills"]
-                    total_stats["baron_kills"] += match_entry["baron_kills"]
-                    total_stats["first_blood_kills"] += 1 if match_entry["first_blood_kill"] else 0
-                    total_stats["first_blood_assists"] += 1 if match_entry["first_blood_assist"] else 0
-                    total_stats["double_kills"] += match_entry["double_kills"]
-                    total_stats["triple_kills"] += match_entry["triple_kills"]
-                    total_stats["quadra_kills"] += match_entry["quadra_kills"]
-                    total_stats["penta_kills"] += match_entry["penta_kills"]
-                    total_stats["damage_to_objectives"] += match_entry["damage_to_objectives"]
-                    total_stats["damage_self_mitigated"] += match_entry["damage_self_mitigated"]
-                    total_stats["total_damage_taken"] += match_entry["total_damage_taken"]
-                    total_stats["time_ccing_others"] += match_entry["time_ccing_others"]
-                    total_stats["wards_placed"] += match_entry["wards_placed"]
-                    total_stats["wards_killed"] += match_entry["wards_killed"]
-                    total_stats["control_wards_placed"] += match_entry["control_wards_placed"]
-                    total_stats["skillshots_dodged"] += match_entry["skillshots_dodged"]
-                    total_stats["skillshots_hit"] += match_entry["skillshots_hit"]
-                    break
+def finalize_player_data(base: dict, table: MatchTable) -> dict:
+    """매치 테이블의 열 단위 집계로 최종 분석 결과 생성"""
+    total_games = len(table)
 
     # 최근 모스트 계산 (최근 20게임 기준)
-    champion_counter = Counter(recent_champions)
-    recent_most = champion_counter.most_common(5)  # 상위 5챔피언
-
-    # 챔피언별 상세 통계
-    champion_stats = {}
-    for match in recent_matches_data:
-        champ = match["champion"]
-        if champ not in champion_stats:
-            champion_stats[champ] = {
-                "games": 0, "wins": 0,
-                "kills": 0, "deaths": 0, "assists": 0,
-                "cs": 0, "damage": 0, "gold": 0,
-                "total_duration": 0,
-                "turret_kills": 0, "dragon_kills": 0, "baron_kills": 0,
-                "first_bloods": 0, "solo_kills": 0,
-                "wards_placed": 0, "control_wards": 0,
-            }
-        stats = champion_stats[champ]
-        stats["games"] += 1
-        stats["wins"] += 1 if match["win"] else 0
-        stats["kills"] += match["kills"]
-        stats["deaths"] += match["deaths"]
-        stats["assists"] += match["assists"]
-        stats["cs"] += match["cs"]
-        stats["damage"] += match["damage"]
-        stats["gold"] += match["gold"]
-        stats["total_duration"] += match["game_duration"]
-        stats["turret_kills"] += match["turret_kills"]
-        stats["dragon_kills"] += match["dragon_kills"]
-        stats["baron_kills"] += match["baron_kills"]
-        stats["first_bloods"] += 1 if match["first_blood_kill"] else 0
-        stats["solo_kills"] += match["solo_kills"]
-        stats["wards_placed"] += match["wards_placed"]
-        stats["control_wards"] += match["control_wards_placed"]
+    recent_most = table.counts("champion").most_common(5)  # 상위 5챔피언
 
     # 포지션별 게임 수
-    position_counter = Counter([m["position"] for m in recent_matches_data])
+    position_counter = table.counts("position")
     main_position = position_counter.most_common(1)[0] if position_counter else ("UNKNOWN", 0)
 
     # 평균 KDA 계산
-    total_kills = sum(m["kills"] for m in recent_matches_data)
-    total_deaths = sum(m["deaths"] for m in recent_matches_data)
-    total_assists = sum(m["assists"] for m in recent_matches_data)
+    total_kills = table.total("kills")
+    total_deaths = table.total("deaths")
+    total_assists = table.total("assists")
     avg_kda = (total_kills + total_assists) / max(total_deaths, 1)
 
-    # 게임 수
-    total_games = len(recent_matches_data)
+    # 총계 집계
+    total_stats = {field: table.total(field) for field in TOTAL_STAT_FIELDS}
+    total_stats["first_blood_kills"] = table.total("first_blood_kill")
+    total_stats["first_blood_assists"] = table.total("first_blood_assist")
+    total_stats["solo_kills"] = table.total("tl_solo_kills")
+    total_stats["early_kills"] = table.total("tl_early_kills")
+    total_stats["early_deaths"] = table.total("tl_early_deaths")
+    total_stats["cs_at_10_total"] = table.total("tl_cs_at_10")
+    total_stats["gold_at_10_total"] = table.total("tl_gold_at_10")
+    for field in TIMELINE_SUM_FIELDS:
+        total_stats[field] = table.total(f"tl_{field}")
+    total_stats["games_with_timeline"] = table.total("has_timeline")
+
+    # 챔피언별 상세 통계
+    champion_stats = {
+        champ: {"games": grouped["games"], **{key: grouped[column] for key, column in CHAMPION_STAT_COLUMNS.items()}}
+        for champ, grouped in table.group_by("champion", list(CHAMPION_STAT_COLUMNS.values())).items()
+    }
 
-    # 평균 계산
     # 평균 계산
     avg_stats = {}
     if total_games > 0:
-        # 분당 딜/골드 평균 계산
-        dpm_list = [m.get("damage_per_minute", 0) for m in recent_matches_data if m.get("damage_per_minute", 0) > 0]
-        gpm_list = [m.get("gold_per_minute", 0) for m in recent_matches_data if m.get("gold_per_minute", 0) > 0]
-        avg_dpm = (sum(dpm_list) / len(dpm_list)) if dpm_list else 0
-        avg_gpm = (sum(gpm_list) / len(gpm_list)) if gpm_list else 0
-
         avg_stats = {
-            "avg_damage": sum(m["damage"] for m in recent_matches_data) / total_games,
+            "avg_damage": table.total("damage") / total_games,
             "avg_damage_taken": total_stats["total_damage_taken"] / total_games,
-            "avg_vision_score": sum(m["vision_score"] for m in recent_matches_data) / total_games,
+            "avg_vision_score": table.total("vision_score") / total_games,
             "avg_wards_placed": total_stats["wards_placed"] / total_games,
             "avg_control_wards": total_stats["control_wards_placed"] / total_games,
-            "avg_cs": sum(m["cs"] for m in recent_matches_data) / total_games,
-            "avg_gold": sum(m["gold"] for m in recent_matches_data) / total_games,
             "avg_cc_time": total_stats["time_ccing_others"] / total_games,
             "avg_obj_damage": total_stats["damage_to_objectives"] / total_games,
-            "avg_dpm": avg_dpm,  # 분당 딜량 추가
-            "avg_gpm": avg_gpm,  # 분당 골드 추가
+            # 분당 딜/골드, 킬관여율, 팀딜비중 평균 (값이 있는 게임 기준)
+            "avg_dpm": table.mean_nonzero("damage_per_minute"),
+            "avg_gpm": table.mean_nonzero("gold_per_minute"),
+            "avg_kill_participation": table.mean_nonzero("kill_participation") * 100,
+            "avg_team_damage_pct": table.mean_nonzero("team_damage_percentage") * 100,
         }
 
     # 타임라인 기반 평균
@@ -645,111 +580,323 @@ async def analyze_player(riot_id: str, force_refresh: bool = False) -> tuple[dic
         avg_stats["avg_gold_at_10"] = total_stats["gold_at_10_total"] / total_stats["games_with_timeline"]
         avg_stats["avg_early_kills"] = total_stats["early_kills"] / total_stats["games_with_timeline"]
         avg_stats["avg_early_deaths"] = total_stats["early_deaths"] / total_stats["games_with_timeline"]
+        for field in TIMELINE_SUM_FIELDS:
+            avg_stats[f"avg_{field}"] = total_stats[field] / total_stats["games_with_timeline"]
 
-    result = {
-        "riot_id": f"{game_name}#{tag_line}",
-        "summoner_level": summoner["summonerLevel"],
-        "solo_rank": solo_rank,
-        "flex_rank": flex_rank,
-        "top_champions": masteries,  # 전체 모스트 (숙련도)
+    wins = table.total("win")
+    return {
+        **base,
         "recent_most": recent_most,  # 최근 모스트
         "recent_wins": wins,
-        "recent_losses": losses,
-        "recent_matches": recent_matches_data,
+        "recent_losses": total_games - wins,
+        "match_table": table,
         "champion_stats": champion_stats,
         "main_position": main_position,
         "avg_kda": avg_kda,
         "total_kills": total_kills,
         "total_deaths": total_deaths,
         "total_assists": total_assists,
-        # 새로 추가된 데이터
         "total_stats": total_stats,
         "avg_stats": avg_stats,
+    }
+
+
+def compact_player_data(data: dict) -> dict:
+    """캐시 저장용: 기본 정보 + 매치 테이블 열만 남김 (집계값은 조회할 때 다시 계산)"""
+    compact = {field: data.get(field) for field in BASE_FIELDS}
+    compact["match_table"] = data["match_table"].to_payload()
+    return compact
+
+
+def expand_player_data(stored: dict) -> dict:
+    """캐시에 저장된 형태를 분석 결과로 복원 (이전 형식의 recent_matches도 지원)"""
+    payload = stored.get("match_table")
+    if payload is not None:
+        table = MatchTable.from_payload(payload)
+    else:
+        table = MatchTable.from_entries(stored.get("recent_matches", []))
+    return finalize_player_data({field: stored.get(field) for field in BASE_FIELDS}, table)
+
+
+def split_rank(leagues: list) -> tuple[dict | None, dict | None]:
+    """랭크 목록에서 (솔로랭크, 자유랭크) 추출"""
+    solo_rank = None
+    flex_rank = None
+    for league in leagues:
+        if league["queueType"] == "RANKED_SOLO_5x5":
+            solo_rank = league
+        elif league["queueType"] == "RANKED_FLEX_SR":
+            flex_rank = league
+    return solo_rank, flex_rank
+
+
+async def collect_match_entries(match_ids: list, puuid: str, timeline_count: int) -> list:
+    """
+    매치 상세와 앞쪽 timeline_count게임의 타임라인을 동시에 조회해 match_entry 목록 생성
+    (매치 ID 순서 유지, 플레이어가 없는 매치는 제외)
+    """
+    timeline_ids = match_ids[:timeline_count]
+    fetched = await gather_limited(
+        [get_match_detail(mid) for mid in match_ids] + [get_timeline_metrics(mid) for mid in timeline_ids]
+    )
+    match_details = fetched[:len(match_ids)]
+    prefetched_metrics = dict(zip(timeline_ids, fetched[len(match_ids):]))
+
+    entries = []
+    # 집계는 매치 ID 순서대로 (결정적)
+    for match_id, match_data in zip(match_ids, match_details):
+        if not match_data:
+            continue
+        found = build_match_entry(match_id, match_data, puuid)
+        if found is None:
+            continue
+        match_entry, participant_id = found
+
+        # 타임라인 분석 (앞쪽 게임만 - API 제한 고려)
+        if len(entries) < timeline_count:
+            if match_id in prefetched_metrics:
+                metrics = prefetched_metrics[match_id]
+            else:
+                # 앞선 매치 조회 실패로 미리 받지 못한 경우에만 개별 조회
+                metrics = await get_timeline_metrics(match_id)
+            if metrics:
+                match_entry["timeline"] = metrics.get(str(participant_id), {})
+        entries.append(match_entry)
+    return entries
+
+
+def can_refresh_incrementally(stored: dict) -> bool:
+    """증분 갱신에 필요한 정보(puuid, 현재 형식의 매치 테이블)가 캐시에 있는지 확인"""
+    payload = stored.get("match_table")
+    return (
+        bool(stored.get("puuid"))
+        and payload is not None
+        # 읽을 수 없는 형식의 캐시는 전체 재분석
+        and payload.get("version") in match_table.READABLE_VERSIONS
+    )
+
+
+async def refresh_player(stored: dict) -> dict | None:
+    """
+    캐시된 분석 결과를 증분 갱신
+    - 새로 생긴 매치만 조회해 테이블에 추가하고, 최근 20게임에서 밀려난 행은 제거
+    - 랭크/관전/도전과제만 다시 조회 (소환사/숙련도는 캐시 값 유지)
+    """
+    puuid = stored["puuid"]
+    cached_table = MatchTable.from_payload(stored["match_table"])
+
+    leagues, challenges_data, current_game, match_ids = await asyncio.gather(
+        get_league_entries(puuid),
+        get_player_challenges(puuid),
+        get_current_game(puuid),
+        get_recent_matches(puuid, MATCH_COUNT),
+    )
+    match_ids = match_ids[:MATCH_COUNT]
+    if not match_ids and len(cached_table):
+        # 매치 목록 조회 실패 시 기존 기록을 지우지 않음
+        return None
+
+    # 최근 목록에 남아 있는 매치의 행 위치
+    current_ids = set(match_ids)
+    row_of = {mid: i for i, mid in enumerate(cached_table.text["match_id"]) if mid in current_ids}
+
+    # 새 매치만 조회 (최신 매치가 앞쪽이므로 앞쪽 타임라인 몫은 새 매치에 먼저 배정)
+    new_ids = [mid for mid in match_ids if mid not in row_of]
+    if new_ids:
+        timeline_slots = sum(1 for mid in match_ids[:TIMELINE_COUNT] if mid not in row_of)
+        new_table = MatchTable.from_entries(await collect_match_entries(new_ids, puuid, timeline_slots))
+        for i, mid in enumerate(new_table.text["match_id"]):
+            row_of[mid] = len(cached_table) + i
+        cached_table.extend(new_table)
+        print(f"[증분 갱신] {stored['riot_id']} - 새 매치 {len(new_table)}개, 유지 {len(row_of) - len(new_table)}개")
+
+    # 최신순으로 다시 정렬, 타임라인은 최근 5게임만 유지
+    table = cached_table.take([row_of[mid] for mid in match_ids if mid in row_of])
+    table.clear_timeline(TIMELINE_COUNT)
+
+    solo_rank, flex_rank = split_rank(leagues)
+    base = {
+        "riot_id": stored["riot_id"],
+        "puuid": puuid,
+        "summoner_level": stored["summoner_level"],
+        "solo_rank": solo_rank,
+        "flex_rank": flex_rank,
+        "top_champions": stored["top_champions"],  # 전체 모스트 (숙련도)
         "challenges_data": challenges_data,
         "current_game": current_game,
     }
+    return finalize_player_data(base, table)
 
-    return result, False, None
 
+async def analyze_player(riot_id: str, force_refresh: bool = False,
+                         allow_stale: bool = False) -> tuple[dict | None, bool, str | None, bool]:
+    """
+    플레이어 분석 (닉네임#태그 형식)
+    allow_stale이면 soft TTL이 지난 캐시를 바로 반환 (갱신은 호출하는 쪽에서)
+    Returns: (data, is_cached, cached_ai_analysis, is_stale)
+    """
+    # 캐시 확인 (강제 새로고침이 아닌 경우)
+    if not force_refresh:
+        cached_data, is_cached, cached_ai, is_stale = get_cached_player(riot_id, allow_stale=allow_stale)
+        if cached_data is not None:
+            return cached_data, True, cached_ai, is_stale
 
+    # 같은 플레이어를 동시에 분석 중이면 진행 중인 요청 결과를 함께 사용
+    return await single_flight(("player", get_cache_key(riot_id)), lambda: fetch_player(riot_id))
 
-async def generate_ai_analysis(player_data: dict) -> str | None:
-    """Gemini AI로 플레이어 분석 코멘트 생성"""
-    if not gemini_client:
-        return None
 
-    try:
-        # 분석용 데이터 정리
-        riot_id = player_data["riot_id"]
-        solo_rank = player_data.get("solo_rank")
-        rank_str = f"{solo_rank['tier']} {solo_rank['rank']} ({solo_rank['leaguePoints']}LP)" if solo_rank else "Unranked"
-
-        recent_wins = player_data["recent_wins"]
-        recent_losses = player_data["recent_losses"]
-        total_games = recent_wins + recent_losses
-        win_rate = (recent_wins / total_games * 100) if total_games > 0 else 0
-
-        recent_most = player_data.get("recent_most", [])
-        recent_most_str = ", ".join([f"{champ}({count}판)" for champ, count in recent_most[:5]])
-
-        champion_stats = player_data.get("champion_stats", {})
-        avg_kda = player_data.get("avg_kda", 0)
-        main_pos = player_data.get("main_position", ("UNKNOWN", 0))
-        total_stats = player_data.get("total_stats", {})
-        avg_stats = player_data.get("avg_stats", {})
-
-        # 챔피언별 상세 통계
-        champ_details = []
-        for champ, stats in champion_stats.items():
-            if stats["games"] >= 2:
-                wr = (stats["wins"] / stats["games"]) * 100
-                kda = (stats["kills"] + stats["assists"]) / max(stats["deaths"], 1)
-                avg_dmg = stats["damage"] / stats["games"]
-                champ_details.append(
-                    f"{champ}: {stats['games']}판 {wr:.0f}%승률, KDA {kda:.1f}, "
-                    f"솔로킬 {stats['solo_kills']}회, 평균딜 {avg_dmg:.0f}"
-                )
-
-        # 플레이 스타일 분석용 추가 데이터
-        first_blood_rate = (total_stats.get("first_blood_kills", 0) + total_stats.get("first_blood_assists", 0)) / max(total_games, 1) * 100
-        avg_vision = avg_stats.get("avg_vision_score", 0)
-        avg_damage = avg_stats.get("avg_damage", 0)
-        avg_damage_taken = avg_stats.get("avg_damage_taken", 0)
-        avg_cc_time = avg_stats.get("avg_cc_time", 0)
-        avg_obj_damage = avg_stats.get("avg_obj_damage", 0)
-        avg_dpm = avg_stats.get("avg_dpm", 0)  # 분당 딜량 추가
-        avg_gpm = avg_stats.get("avg_gpm", 0)  # 분당 골드 추가
-        
-        # 타임라인 데이터
-        avg_cs_10 = avg_stats.get("avg_cs_at_10", 0)
-        avg_gold_10 = avg_stats.get("avg_gold_at_10", 0)
-        avg_early_kills = avg_stats.get("avg_early_kills", 0)
-        avg_early_deaths = avg_stats.get("avg_early_deaths", 0)
-
-        # 도전과제 데이터
-        challenges_data = player_data.get("challenges_data")
-        challenge_str = ""
-        if challenges_data:
-            total_points = challenges_data.get("totalPoints", {})
-            level = total_points.get("level", "NONE")
-            pts = total_points.get("current", 0)
-            challenge_str = f"도전과제 티어: {level} ({pts:,}점)"
-
-        # 최근 매치에서 평균 킬관여율, 팀딜비중 계산
-        recent_matches = player_data.get("recent_matches", [])
-        avg_kill_participation = 0
-        avg_team_damage_pct = 0
-        if recent_matches:
-            kp_list = [m.get("kill_participation", 0) for m in recent_matches if m.get("kill_participation")]
-            tdp_list = [m.get("team_damage_percentage", 0) for m in recent_matches if m.get("team_damage_percentage")]
-            if kp_list:
-                avg_kill_participation = sum(kp_list) / len(kp_list) * 100
-            if tdp_list:
-                avg_team_damage_pct = sum(tdp_list) / len(tdp_list) * 100
-
-        prompt = f"""리그 오브 레전드 플레이어 분석을 해주세요. 스크림 상대로 만났을 때 어떻게 대응해야 할지 조언해주세요.
-
-플레이어: {riot_id}
+async def fetch_player(riot_id: str) -> tuple[dict | None, bool, str | None, bool]:
+    """
+    Riot API로 플레이어 분석 (캐시 확인 없이)
+    Returns: (data, is_cached, cached_ai_analysis, is_stale)
+    """
+    # 만료되었거나 강제 새로고침이면, 이전 분석 결과가 있을 때 새 게임만 반영
+    previous = player_cache.get(get_cache_key(riot_id))
+    if previous is not None and can_refresh_incrementally(previous[1]):
+        refreshed = await refresh_player(previous[1])
+        if refreshed is not None:
+            return refreshed, False, None, False
+
+    # 닉네임 파싱
+    if "#" in riot_id:
+        game_name, tag_line = riot_id.rsplit("#", 1)
+    else:
+        game_name = riot_id
+        tag_line = "KR1"  # 기본 태그
+
+    # 계정 정보 조회
+    account = await get_account_by_riot_id(game_name, tag_line)
+    if not account:
+        return None, False, None, False
+
+    puuid = account["puuid"]
+
+    # PUUID 기반 조회는 서로 의존성이 없으므로 동시에 요청
+    # (소환사, 랭크, 숙련도 상위 5, 도전과제, 현재 게임, 최근 랭크 게임 20개)
+    summoner, leagues, masteries, challenges_data, current_game, match_ids = await asyncio.gather(
+        get_summoner_by_puuid(puuid),
+        get_league_entries(puuid),
+        get_champion_mastery(puuid, 5),
+        get_player_challenges(puuid),
+        get_current_game(puuid),
+        get_recent_matches(puuid, MATCH_COUNT),
+    )
+    if not summoner:
+        return None, False, None, False
+
+    # 솔로랭크 정보 추출
+    solo_rank, flex_rank = split_rank(leagues)
+
+    # 매치 상세(20게임)와 타임라인(최근 5게임)을 동시에 조회
+    table = MatchTable.from_entries(await collect_match_entries(match_ids[:MATCH_COUNT], puuid, TIMELINE_COUNT))
+
+    base = {
+        "riot_id": f"{game_name}#{tag_line}",
+        "puuid": puuid,
+        "summoner_level": summoner["summonerLevel"],
+        "solo_rank": solo_rank,
+        "flex_rank": flex_rank,
+        "top_champions": masteries,  # 전체 모스트 (숙련도)
+        "challenges_data": challenges_data,
+        "current_game": current_game,
+    }
+    return finalize_player_data(base, table), False, None, False
+
+
+
+# 플레이어 1명 분석 요청 (프롬프트 끝부분)
+PLAYER_ANALYSIS_REQUEST = """===== 분석 요청 =====
+위 데이터를 종합하여 다음을 분석해주세요:
+1. 플레이어의 주요 강점 (라인전/한타/스플릿/시야 등)
+2. 플레이어의 약점 또는 취약 시점
+3. 주의해야 할 챔피언과 그 이유
+4. 스크림에서 이 플레이어를 상대할 때 구체적인 대응 전략
+
+5줄 이내로 핵심만 간결하게 작성해주세요. 한국어로 답변하세요."""
+
+# 로스터 전체 분석 요청 (JSON 응답)
+ROSTER_ANALYSIS_REQUEST = """===== 분석 요청 =====
+위 선수들은 스크림에서 만날 상대팀입니다. 선수별로 다음을 분석해주세요:
+1. 플레이어의 주요 강점 (라인전/한타/스플릿/시야 등)
+2. 플레이어의 약점 또는 취약 시점
+3. 주의해야 할 챔피언과 그 이유
+4. 스크림에서 이 플레이어를 상대할 때 구체적인 대응 전략
+선수별 분석은 각각 5줄 이내로 핵심만 간결하게 작성하고,
+팀 전체의 성향(주요 캐리 라인, 약한 라인, 추천 밴/공략 포인트)을 5줄 이내로 요약해주세요.
+
+반드시 아래 JSON 형식으로만 응답해주세요. 한국어로 작성하세요:
+{
+  "players": [
+    {"index": 1, "analysis": "선수 1 분석"}
+  ],
+  "team_summary": "팀 요약"
+}
+index는 위 선수 번호와 같아야 하고, 모든 선수를 포함해야 합니다."""
+
+
+def build_player_profile(player_data: dict) -> str:
+    """AI 분석 프롬프트에 넣을 플레이어 통계 요약"""
+    # 분석용 데이터 정리
+    riot_id = player_data["riot_id"]
+    solo_rank = player_data.get("solo_rank")
+    rank_str = f"{solo_rank['tier']} {solo_rank['rank']} ({solo_rank['leaguePoints']}LP)" if solo_rank else "Unranked"
+
+    recent_wins = player_data["recent_wins"]
+    recent_losses = player_data["recent_losses"]
+    total_games = recent_wins + recent_losses
+    win_rate = (recent_wins / total_games * 100) if total_games > 0 else 0
+
+    recent_most = player_data.get("recent_most", [])
+    recent_most_str = ", ".join([f"{champ}({count}판)" for champ, count in recent_most[:5]])
+
+    champion_stats = player_data.get("champion_stats", {})
+    avg_kda = player_data.get("avg_kda", 0)
+    main_pos = player_data.get("main_position", ("UNKNOWN", 0))
+    total_stats = player_data.get("total_stats", {})
+    avg_stats = player_data.get("avg_stats", {})
+
+    # 챔피언별 상세 통계
+    champ_details = []
+    for champ, stats in champion_stats.items():
+        if stats["games"] >= 2:
+            wr = (stats["wins"] / stats["games"]) * 100
+            kda = (stats["kills"] + stats["assists"]) / max(stats["deaths"], 1)
+            avg_dmg = stats["damage"] / stats["games"]
+            champ_details.append(
+                f"{champ}: {stats['games']}판 {wr:.0f}%승률, KDA {kda:.1f}, "
+                f"솔로킬 {stats['solo_kills']}회, 평균딜 {avg_dmg:.0f}"
+            )
+
+    # 플레이 스타일 분석용 추가 데이터
+    first_blood_rate = (total_stats.get("first_blood_kills", 0) + total_stats.get("first_blood_assists", 0)) / max(total_games, 1) * 100
+    avg_vision = avg_stats.get("avg_vision_score", 0)
+    avg_damage = avg_stats.get("avg_damage", 0)
+    avg_damage_taken = avg_stats.get("avg_damage_taken", 0)
+    avg_cc_time = avg_stats.get("avg_cc_time", 0)
+    avg_obj_damage = avg_stats.get("avg_obj_damage", 0)
+    avg_dpm = avg_stats.get("avg_dpm", 0)  # 분당 딜량 추가
+    avg_gpm = avg_stats.get("avg_gpm", 0)  # 분당 골드 추가
+    
+    # 타임라인 데이터
+    avg_cs_10 = avg_stats.get("avg_cs_at_10", 0)
+    avg_gold_10 = avg_stats.get("avg_gold_at_10", 0)
+    avg_early_kills = avg_stats.get("avg_early_kills", 0)
+    avg_early_deaths = avg_stats.get("avg_early_deaths", 0)
+
+    # 도전과제 데이터
+    challenges_data = player_data.get("challenges_data")
+    challenge_str = ""
+    if challenges_data:
+        total_points = challenges_data.get("totalPoints", {})
+        level = total_points.get("level", "NONE")
+        pts = total_points.get("current", 0)
+        challenge_str = f"도전과제 티어: {level} ({pts:,}점)"
+
+    # 평균 킬관여율, 팀딜비중
+    avg_kill_participation = avg_stats.get("avg_kill_participation", 0)
+    avg_team_damage_pct = avg_stats.get("avg_team_damage_pct", 0)
+
+    return f"""플레이어: {riot_id}
 랭크: {rank_str}
 레벨: {player_data.get('summoner_level', 0)}
 {challenge_str}
@@ -771,6 +918,9 @@ async def generate_ai_analysis(player_data: dict) -> str | None:
 - 평균 10분 골드: {avg_gold_10:.0f}
 - 10분 전 평균 킬: {avg_early_kills:.1f}회
 - 10분 전 평균 데스: {avg_early_deaths:.1f}회
+- 라인전(14분 전) 평균 라인 킬: {avg_stats.get("avg_lane_kills", 0):.1f}회 / 로밍 킬: {avg_stats.get("avg_roam_kills", 0):.1f}회
+- 라인전 평균 갱 허용: {avg_stats.get("avg_ganks_received", 0):.1f}회
+- 상대 정글 교전 관여: 평균 {avg_stats.get("avg_jungle_invades", 0):.1f}회
 
 ===== 오브젝트 & 스플릿 =====
 - 타워 파괴: 총 {total_stats.get("turret_kills", 0)}개
@@ -799,29 +949,106 @@ async def generate_ai_analysis(player_data: dict) -> str | None:
 - 스킬샷 회피: 총 {total_stats.get("skillshots_dodged", 0)}회
 
 ===== 챔피언별 상세 통계 =====
-{chr(10).join(champ_details[:5])}
+{chr(10).join(champ_details[:5])}"""
 
-===== 분석 요청 =====
-위 데이터를 종합하여 다음을 분석해주세요:
-1. 플레이어의 주요 강점 (라인전/한타/스플릿/시야 등)
-2. 플레이어의 약점 또는 취약 시점
-3. 주의해야 할 챔피언과 그 이유
-4. 스크림에서 이 플레이어를 상대할 때 구체적인 대응 전략
 
-5줄 이내로 핵심만 간결하게 작성해주세요. 한국어로 답변하세요."""
+async def generate_ai_analysis(player_data: dict, on_partial=None) -> str | None:
+    """
+    Gemini AI로 플레이어 분석 코멘트 생성
+    on_partial이 있으면 스트리밍으로 받으면서 지금까지의 텍스트로 호출 (AI_STREAM_EDIT_SECONDS마다 최대 1회)
+    """
+    if not gemini_client:
+        return None
 
-        response = await gemini_client.aio.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[{"parts": [{"text": prompt}]}]
+    try:
+        riot_id = player_data["riot_id"]
+        prompt = (
+            "리그 오브 레전드 플레이어 분석을 해주세요. 스크림 상대로 만났을 때 어떻게 대응해야 할지 조언해주세요.\n\n"
+            f"{build_player_profile(player_data)}\n\n{PLAYER_ANALYSIS_REQUEST}"
         )
 
-        return response.text.strip()
+        # 같은 통계로 만든 프롬프트면 캐시된 응답 사용
+        cache_key = make_key(GEMINI_MODEL, prompt)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            print(f"[AI 분석] {riot_id} - 응답 캐시 히트")
+            return cached
+
+        if on_partial is None:
+            response = await gemini_client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=[{"parts": [{"text": prompt}]}]
+            )
+            text = response.text.strip()
+        else:
+            text = ""
+            last_update = 0.0
+            async for chunk in await gemini_client.aio.models.generate_content_stream(
+                model=GEMINI_MODEL,
+                contents=[{"parts": [{"text": prompt}]}]
+            ):
+                text += chunk.text or ""
+                now = time.monotonic()
+                if now - last_update >= AI_STREAM_EDIT_SECONDS:
+                    last_update = now
+                    await on_partial(text)
+            text = text.strip()
+
+        if text:
+            llm_cache.put(cache_key, GEMINI_MODEL, text)
+        return text
 
     except Exception as e:
         print(f"[AI 분석 오류] {e}")
         return None
 
 
+async def generate_roster_analysis(roster: list[dict]) -> tuple[list[str], str] | None:
+    """
+    상대팀 여러 명을 Gemini 1회 호출로 분석 (공통 지시문은 한 번만)
+    Returns: (선수별 분석 - roster 순서, 팀 요약) - 실패하거나 빠진 선수가 있으면 None
+    """
+    if not gemini_client or not roster:
+        return None
+
+    sections = [f"### 선수 {i}\n{build_player_profile(player_data)}" for i, player_data in enumerate(roster, 1)]
+    prompt = (
+        f"리그 오브 레전드 상대팀 {len(roster)}명의 분석을 해주세요. 스크림 상대로 만났을 때 어떻게 대응해야 할지 조언해주세요.\n\n"
+        + "\n\n".join(sections)
+        + f"\n\n{ROSTER_ANALYSIS_REQUEST}"
+    )
+
+    try:
+        cache_key = make_key(GEMINI_MODEL, prompt)
+        content = llm_cache.get(cache_key)
+        if content is None:
+            response = await gemini_client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=[{"parts": [{"text": prompt}]}],
+                config={"response_mime_type": "application/json"}
+            )
+            content = response.text.strip()
+        else:
+            print(f"[AI 분석] 로스터 {len(roster)}명 - 응답 캐시 히트")
+
+        parsed = json.loads(content)
+        analyses = {int(item["index"]): str(item["analysis"]).strip() for item in parsed["players"]}
+        player_analyses = [analyses.get(i, "") for i in range(1, len(roster) + 1)]
+        if not all(player_analyses):
+            print(f"[AI 분석] 로스터 응답에 빠진 선수가 있음 ({len(analyses)}/{len(roster)})")
+            return None
+
+        llm_cache.put(cache_key, GEMINI_MODEL, content)
+        return player_analyses, str(parsed.get("team_summary", "")).strip()
+
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        print(f"[AI 분석] 로스터 응답 파싱 실패: {e}")
+        return None
+    except Exception as e:
+        print(f"[AI 분석 오류] {e}")
+        return None
+
+
 def format_rank(rank_data: dict | None) -> str:
     """랭크 정보 포맷팅"""
     if not rank_data:
@@ -857,12 +1084,306 @@ def format_position(position: str) -> str:
     return pos_map.get(position, position)
 
 
+def add_player_fields(embed: discord.Embed, player_name: str, data: dict | None, is_cached: bool,
+                      ai_analysis: str | None) -> None:
+    """플레이어 1명의 분석 결과를 임베드 필드로 추가"""
+    if data is None:
+        embed.add_field(
+            name=f"{player_name}",
+            value="❌ 플레이어를 찾을 수 없습니다.",
+            inline=False
+        )
+        return
+
+    # 캐시 표시
+    cache_badge = " 📦" if is_cached else ""
+
+    # 현재 게임 중 표시 (캐시된 데이터가 아닐 때만)
+    if not is_cached and data.get("current_game"):
+        current = data["current_game"]
+        game_mode = current.get("gameMode", "UNKNOWN")
+        game_length = current.get("gameLength", 0) // 60
+        embed.add_field(
+            name=f"🎮 현재 게임 중!",
+            value=f"모드: {game_mode} | 진행시간: {game_length}분",
+            inline=False
+        )
+
+    # 솔로랭크 & 플렉스
+    solo_str = format_rank(data["solo_rank"])
+    flex_str = format_rank(data.get("flex_rank"))
+
+    # 주 포지션
+    main_pos, pos_games = data.get("main_position", ("UNKNOWN", 0))
+    pos_str = f"{format_position(main_pos)} ({pos_games}게임)"
+
+    # 전체 모스트 (숙련도 기반)
+    top_champs = []
+    for mastery in data["top_champions"][:3]:
+        champ_name = get_champion_name(mastery["championId"])
+        points = mastery["championPoints"]
+        top_champs.append(f"{champ_name} ({points // 1000}k)")
+    all_most_str = " | ".join(top_champs) if top_champs else "데이터 없음"
+
+    # 최근 모스트 (최근 20게임 기준) - 상세 정보 포함
+    recent_most = data.get("recent_most", [])
+    recent_most_parts = []
+    champion_stats = data.get("champion_stats", {})
+    for champ, count in recent_most[:3]:
+        stats = champion_stats.get(champ, {})
+        if stats:
+            wins = stats.get("wins", 0)
+            games = stats.get("games", count)
+            wr = (wins / games * 100) if games > 0 else 0
+            kda = (stats["kills"] + stats["assists"]) / max(stats["deaths"], 1)
+            recent_most_parts.append(f"{champ} ({games}판 {wr:.0f}% KDA {kda:.1f})")
+        else:
+            recent_most_parts.append(f"{champ} ({count}판)")
+    recent_most_str = " | ".join(recent_most_parts) if recent_most_parts else "데이터 없음"
+
+    # 최근 전적
+    recent_total = data["recent_wins"] + data["recent_losses"]
+    recent_wr = (data["recent_wins"] / recent_total * 100) if recent_total > 0 else 0
+    recent_str = f"{data['recent_wins']}승 {data['recent_losses']}패 ({recent_wr:.0f}%)"
+
+    # 평균 KDA
+    avg_kda = data.get("avg_kda", 0)
+    kda_str = f"{data['total_kills']}/{data['total_deaths']}/{data['total_assists']} (평균 {avg_kda:.2f})"
+
+    # 기본 정보 필드
+    value = f"**솔로랭크:** {solo_str}\n"
+    if data.get("flex_rank"):
+        flex_str = format_rank(data["flex_rank"])
+        value += f"**자유랭크:** {flex_str}\n"
+    value += f"**주 포지션:** {pos_str}\n"
+    value += f"**전체 모스트:** {all_most_str}\n"
+    value += f"**최근 모스트:** {recent_most_str}\n"
+    value += f"**최근 {recent_total}게임:** {recent_str}\n"
+    value += f"**KDA:** {kda_str}"
+
+    embed.add_field(
+        name=f"{data['riot_id']} (Lv.{data['summoner_level']}){cache_badge}",
+        value=value,
+        inline=False
+    )
+
+    # 상세 통계 필드 추가
+    total_stats = data.get("total_stats", {})
+    avg_stats = data.get("avg_stats", {})
+
+    if total_stats and recent_total > 0:
+        # 킬관여율, 팀딜비중
+        avg_kp = avg_stats.get("avg_kill_participation", 0)
+        avg_tdp = avg_stats.get("avg_team_damage_pct", 0)
+
+        first_blood_rate = (total_stats.get("first_blood_kills", 0) + total_stats.get("first_blood_assists", 0)) / recent_total * 100
+
+        # 공격성 & 전투 통계
+        combat_value = f"🗡️ **공격성:** 퍼블관여 {first_blood_rate:.0f}% | 솔로킬 {total_stats.get('solo_kills', 0)}회 | 킬관여 {avg_kp:.0f}%\n"
+        combat_value += f"💥 **멀티킬:** 더블 {total_stats.get('double_kills', 0)} | 트리플 {total_stats.get('triple_kills', 0)} | 쿼드라 {total_stats.get('quadra_kills', 0)} | 펜타 {total_stats.get('penta_kills', 0)}\n"
+        combat_value += f"💪 **전투:** 딜 {avg_stats.get('avg_damage', 0):.0f} ({avg_tdp:.0f}%) | 탱킹 {avg_stats.get('avg_damage_taken', 0):.0f} | CC {avg_stats.get('avg_cc_time', 0):.1f}초\n"
+        combat_value += f"📈 **분당:** DPM {avg_stats.get('avg_dpm', 0):.0f} | GPM {avg_stats.get('avg_gpm', 0):.0f}"
+
+        embed.add_field(
+            name=f"⚔️ 전투 통계",
+            value=combat_value,
+            inline=False
+        )
+
+        # 오브젝트 & 시야
+        obj_value = f"🏰 **오브젝트:** 타워 {total_stats.get('turret_kills', 0)} | 플레이트 {total_stats.get('turret_takedowns', 0)} | 용 {total_stats.get('dragon_kills', 0)} | 바론 {total_stats.get('baron_kills', 0)}\n"
+        obj_value += f"🎯 **오브젝트 딜:** 평균 {avg_stats.get('avg_obj_damage', 0):.0f}\n"
+        obj_value += f"👁️ **시야:** 점수 {avg_stats.get('avg_vision_score', 0):.1f} | 와드 {avg_stats.get('avg_wards_placed', 0):.1f} | 제어 {avg_stats.get('avg_control_wards', 0):.1f} | 제거 {total_stats.get('wards_killed', 0)}"
+
+        embed.add_field(
+            name=f"🏛️ 오브젝트 & 시야",
+            value=obj_value,
+            inline=False
+        )
+
+        # 라인전 (타임라인 데이터가 있는 경우)
+        if total_stats.get("games_with_timeline", 0) > 0:
+            lane_value = f"📊 **10분 기준** (최근 {total_stats['games_with_timeline']}게임)\n"
+            lane_value += f"CS: {avg_stats.get('avg_cs_at_10', 0):.0f} | 골드: {avg_stats.get('avg_gold_at_10', 0):.0f}\n"
+            lane_value += f"초반 킬: {avg_stats.get('avg_early_kills', 0):.1f} | 초반 데스: {avg_stats.get('avg_early_deaths', 0):.1f}\n"
+            lane_value += f"라인 킬: {avg_stats.get('avg_lane_kills', 0):.1f} | 로밍 킬: {avg_stats.get('avg_roam_kills', 0):.1f} | 갱 허용: {avg_stats.get('avg_ganks_received', 0):.1f}"
+
+            embed.add_field(
+                name=f"🛡️ 라인전",
+                value=lane_value,
+                inline=True
+            )
+
+        # 스킬샷 통계 (있는 경우에만)
+        if total_stats.get("skillshots_hit", 0) > 0 or total_stats.get("skillshots_dodged", 0) > 0:
+            skill_value = f"명중: {total_stats.get('skillshots_hit', 0)} | 회피: {total_stats.get('skillshots_dodged', 0)}"
+            embed.add_field(
+                name=f"🎯 스킬샷",
+                value=skill_value,
+                inline=True
+            )
+
+    # 도전과제 정보 표시
+    challenges_data = data.get("challenges_data")
+    if challenges_data:
+        total_points = challenges_data.get("totalPoints", {})
+        level = total_points.get("level", "NONE")
+        current_pts = total_points.get("current", 0)
+        percentile = total_points.get("percentile", 0) * 100
+
+        challenge_emoji = {"IRON": "🔩", "BRONZE": "🥉", "SILVER": "🥈", "GOLD": "🥇",
+                           "PLATINUM": "💎", "DIAMOND": "💠", "MASTER": "🏆",
+                           "GRANDMASTER": "🔥", "CHALLENGER": "👑", "NONE": "⚪"}
+
+        embed.add_field(
+            name=f"🏅 도전과제",
+            value=f"{challenge_emoji.get(level, '⚪')} {level}\n{current_pts:,}점 (상위 {percentile:.1f}%)",
+            inline=True
+        )
+
+    # AI 분석 (Gemini)
+    if ai_analysis:
+        embed.add_field(
+            name=f"🤖 AI 분석",
+            value=f"```{ai_analysis[:900]}```",
+            inline=False
+        )
+
+
+async def generate_and_cache_ai_analysis(player: str, data: dict, is_cached: bool, on_partial=None) -> str | None:
+    """AI 분석 생성 후 새로 분석한 데이터면 캐시에 저장 (스트리밍 중에도 최종 텍스트만 저장)"""
+    ai_analysis = await generate_ai_analysis(data, on_partial)
+    if not is_cached and ai_analysis:
+        set_cached_player(player, data, ai_analysis)
+    return ai_analysis
+
+
+async def analyze_player_with_ai(player: str, force_refresh: bool = False, allow_stale: bool = False,
+                                 with_ai: bool = True, on_partial=None) -> tuple[dict | None, bool, str | None, bool]:
+    """
+    플레이어 분석 + AI 분석 + 캐시 저장
+    with_ai=False면 캐시된 AI 분석만 사용하고 새 분석/캐시 저장은 호출하는 쪽에서 (로스터 모드)
+    on_partial(data, is_cached, is_stale, text)은 AI 분석 스트리밍 중간 결과를 받음
+    Returns: (data, is_cached, ai_analysis, is_stale)
+    """
+    data, is_cached, cached_ai, is_stale = await analyze_player(
+        player, force_refresh=force_refresh, allow_stale=allow_stale
+    )
+    if data is None:
+        return None, False, None, False
+
+    ai_analysis = None
+    if gemini_client and not with_ai:
+        ai_analysis = cached_ai if is_cached else None
+    elif gemini_client:
+        # 캐시된 경우 캐시된 AI 분석 사용
+        if is_cached and cached_ai:
+            ai_analysis = cached_ai
+        else:
+            async def partial(text: str):
+                await on_partial(data, is_cached, is_stale, text)
+
+            # 같은 플레이어의 AI 분석이 진행 중이면 그 결과를 함께 사용
+            ai_analysis = await single_flight(
+                ("ai", get_cache_key(player)),
+                lambda: generate_and_cache_ai_analysis(player, data, is_cached, partial if on_partial else None)
+            )
+    elif not is_cached:
+        # AI 분석 없이 캐시 저장
+        set_cached_player(player, data, None)
+
+    return data, is_cached, ai_analysis, is_stale
+
+
+async def fill_roster_analysis(players: list[str], results: dict[int, tuple], on_partial=None) -> str | None:
+    """
+    로스터 모드: 분석이 끝난 선수들의 AI 분석을 Gemini 1회 호출로 채움
+    (AI 분석이 캐시된 선수는 그대로 두고, 응답이 잘못되면 선수별 호출로 대체)
+    on_partial(index, text)은 선수별 호출로 대체될 때 스트리밍 중간 결과를 받음
+    Returns: 팀 요약 (실패 시 None)
+    """
+    indices = [i for i in sorted(results) if results[i][0] is not None]
+    pending = [i for i in indices if results[i][2] is None]
+    # 찾은 선수가 1명뿐이면 로스터로 묶지 않고 선수별 분석
+    roster = await generate_roster_analysis([results[i][0] for i in indices]) if len(indices) > 1 else None
+
+    if roster is not None:
+        player_analyses, team_summary = roster
+        analysis_of = dict(zip(indices, player_analyses))
+        for i in pending:
+            data, is_cached, _, is_stale = results[i]
+            results[i] = (data, is_cached, analysis_of[i], is_stale)
+            if not is_cached:
+                set_cached_player(players[i], data, analysis_of[i])
+        return team_summary or None
+
+    async def fallback(i: int):
+        data, is_cached, _, is_stale = results[i]
+
+        async def partial(text: str):
+            await on_partial(i, text)
+
+        ai_analysis = await single_flight(
+            ("ai", get_cache_key(players[i])),
+            lambda: generate_and_cache_ai_analysis(players[i], data, is_cached, partial if on_partial else None)
+        )
+        results[i] = (data, is_cached, ai_analysis, is_stale)
+
+    await asyncio.gather(*(fallback(i) for i in pending))
+    return None
+
+
+def build_analysis_embed(players: list[str], results: dict[int, tuple],
+                         team_summary: str | None = None) -> discord.Embed:
+    """분석 결과 임베드 생성 (아직 끝나지 않은 플레이어는 진행 중으로 표시)"""
+    embed = discord.Embed(
+        title=f"🔍 플레이어 분석 결과 ({len(players)}명)",
+        color=0xe74c3c
+    )
+
+    # 캐시 사용 여부 표시
+    cached_count = sum(1 for _, is_cached, _, is_stale in results.values() if is_cached and not is_stale)
+    stale_count = sum(1 for _, _, _, is_stale in results.values() if is_stale)
+    description = []
+    if cached_count > 0:
+        description.append(f"📦 {cached_count}명은 캐시된 데이터 사용 ({CACHE_EXPIRY_DAYS:g}일 이내 조회됨)")
+    if stale_count > 0:
+        description.append(f"📦 {stale_count}명은 오래된 캐시 표시 중 - 최신 데이터로 갱신 중...")
+    if description:
+        embed.description = "\n".join(description)
+
+    for i, player_name in enumerate(players):
+        if i in results:
+            data, is_cached, ai_analysis, _ = results[i]
+            add_player_fields(embed, player_name, data, is_cached, ai_analysis)
+        else:
+            embed.add_field(name=f"{player_name}", value="🔄 분석 중...", inline=False)
+
+    if team_summary:
+        embed.add_field(name="🧠 팀 요약 (AI)", value=team_summary[:900], inline=False)
+
+    if len(results) < len(players):
+        embed.set_footer(text=f"🔄 {len(results)}/{len(players)}명 완료 | 📦=캐시({CACHE_EXPIRY_DAYS:g}일)")
+    else:
+        embed.set_footer(text=f"📦=캐시({CACHE_EXPIRY_DAYS:g}일) | 새로고침: !analyze refresh 닉네임#태그")
+    return embed
+
+
 # ==========================================
 # 명령어
 # ==========================================
+# 실행 중인 백그라운드 작업 (가비지 컬렉션 방지용 참조)
+background_tasks: set[asyncio.Task] = set()
+
+
 @bot.event
 async def on_ready():
-    await load_champion_map()
+    get_riot_client()
+    # 챔피언 데이터는 디스크 캐시로 바로 사용하고, 최신 버전 확인은 주기적으로 백그라운드에서
+    if not CHAMPION_MAP:
+        load_champion_map()
+    if not champion_refresh_loop.is_running():
+        champion_refresh_loop.start()
     print(f'상대팀 분석 봇 로그인 성공: {bot.user}')
 
 
@@ -928,210 +1449,92 @@ async def analyze_cmd(ctx, *args):
         await ctx.send("❌ 최대 5명까지만 분석할 수 있습니다.")
         return
 
+    # 첫 실행이라 챔피언 데이터가 없으면 받아온 뒤에 분석 (Unknown 이름이 캐시에 남지 않도록)
+    if not await ensure_champion_map():
+        await ctx.send("❌ 챔피언 데이터를 불러오지 못했습니다. 잠시 후 다시 시도해주세요.")
+        return
+
     # 시작 시 만료된 캐시 정리
     clear_expired_cache()
 
     refresh_text = " (강제 새로고침)" if force_refresh else ""
     processing_msg = await ctx.send(f"🔄 {len(players)}명 분석 중...{refresh_text}")
 
-    results = []
-    cached_count = 0
-
-    for player in players:
-        data, is_cached, cached_ai = await analyze_player(player, force_refresh=force_refresh)
-        if is_cached:
-            cached_count += 1
-        results.append((player, data, is_cached, cached_ai))
-
-    # 임베드 생성
-    embed = discord.Embed(
-        title=f"🔍 플레이어 분석 결과 ({len(players)}명)",
-        color=0xe74c3c
-    )
-
-    # 캐시 사용 여부 표시
-    if cached_count > 0:
-        embed.description = f"📦 {cached_count}명은 캐시된 데이터 사용 (7일 이내 조회됨)"
-
-    for i, (player_name, data, is_cached, cached_ai) in enumerate(results):
-        if data is None:
-            embed.add_field(
-                name=f"{player_name}",
-                value="❌ 플레이어를 찾을 수 없습니다.",
-                inline=False
-            )
-            continue
-
-        # 캐시 표시
-        cache_badge = " 📦" if is_cached else ""
-
-        # 현재 게임 중 표시 (캐시된 데이터가 아닐 때만)
-        if not is_cached and data.get("current_game"):
-            current = data["current_game"]
-            game_mode = current.get("gameMode", "UNKNOWN")
-            game_length = current.get("gameLength", 0) // 60
-            embed.add_field(
-                name=f"🎮 현재 게임 중!",
-                value=f"모드: {game_mode} | 진행시간: {game_length}분",
-                inline=False
-            )
+    results = {}
+    team_summary = None
+    edit_lock = asyncio.Lock()
+    # 2명 이상이면 AI 분석은 로스터 전체를 한 번에 요청
+    roster_mode = gemini_client is not None and len(players) > 1
+
+    last_edit = 0.0
+    scheduled_edit = None
+
+    async def show():
+        nonlocal last_edit
+        async with edit_lock:
+            await processing_msg.edit(content=None, embed=build_analysis_embed(players, results, team_summary))
+            last_edit = time.monotonic()
+
+    async def show_throttled():
+        # AI 분석 스트리밍 중에는 AI_STREAM_EDIT_SECONDS에 한 번만 수정 (예약된 수정이 있으면 그때 최신 내용 반영)
+        nonlocal scheduled_edit
+        if scheduled_edit is not None and not scheduled_edit.done():
+            return
 
-        # 솔로랭크 & 플렉스
-        solo_str = format_rank(data["solo_rank"])
-        flex_str = format_rank(data.get("flex_rank"))
-
-        # 주 포지션
-        main_pos, pos_games = data.get("main_position", ("UNKNOWN", 0))
-        pos_str = f"{format_position(main_pos)} ({pos_games}게임)"
-
-        # 전체 모스트 (숙련도 기반)
-        top_champs = []
-        for mastery in data["top_champions"][:3]:
-            champ_name = get_champion_name(mastery["championId"])
-            points = mastery["championPoints"]
-            top_champs.append(f"{champ_name} ({points // 1000}k)")
-        all_most_str = " | ".join(top_champs) if top_champs else "데이터 없음"
-
-        # 최근 모스트 (최근 20게임 기준) - 상세 정보 포함
-        recent_most = data.get("recent_most", [])
-        recent_most_parts = []
-        champion_stats = data.get("champion_stats", {})
-        for champ, count in recent_most[:3]:
-            stats = champion_stats.get(champ, {})
-            if stats:
-                wins = stats.get("wins", 0)
-                games = stats.get("games", count)
-                wr = (wins / games * 100) if games > 0 else 0
-                kda = (stats["kills"] + stats["assists"]) / max(stats["deaths"], 1)
-                recent_most_parts.append(f"{champ} ({games}판 {wr:.0f}% KDA {kda:.1f})")
+        async def delayed():
+            await asyncio.sleep(max(0.0, last_edit + AI_STREAM_EDIT_SECONDS - time.monotonic()))
+            await show()
+
+        scheduled_edit = asyncio.create_task(delayed())
+        background_tasks.add(scheduled_edit)
+        scheduled_edit.add_done_callback(background_tasks.discard)
+
+    async def stream_partial(index: int, data: dict, is_cached: bool, is_stale: bool, text: str):
+        results[index] = (data, is_cached, text + " ▌", is_stale)
+        await show_throttled()
+
+    async def revalidate(index: int, player: str):
+        # 오래된 캐시를 보여준 플레이어는 갱신 후 메시지 수정
+        # (로스터 모드에서는 AI 분석을 따로 부르지 않고 로스터 요청에서 함께 채움)
+        try:
+            fresh = await analyze_player_with_ai(player, force_refresh=True, with_ai=not roster_mode)
+            if fresh[0] is not None:
+                results[index] = fresh
             else:
-                recent_most_parts.append(f"{champ} ({count}판)")
-        recent_most_str = " | ".join(recent_most_parts) if recent_most_parts else "데이터 없음"
-
-        # 최근 전적
-        recent_total = data["recent_wins"] + data["recent_losses"]
-        recent_wr = (data["recent_wins"] / recent_total * 100) if recent_total > 0 else 0
-        recent_str = f"{data['recent_wins']}승 {data['recent_losses']}패 ({recent_wr:.0f}%)"
-
-        # 평균 KDA
-        avg_kda = data.get("avg_kda", 0)
-        kda_str = f"{data['total_kills']}/{data['total_deaths']}/{data['total_assists']} (평균 {avg_kda:.2f})"
-
-        # 기본 정보 필드
-        value = f"**솔로랭크:** {solo_str}\n"
-        if data.get("flex_rank"):
-            flex_str = format_rank(data["flex_rank"])
-            value += f"**자유랭크:** {flex_str}\n"
-        value += f"**주 포지션:** {pos_str}\n"
-        value += f"**전체 모스트:** {all_most_str}\n"
-        value += f"**최근 모스트:** {recent_most_str}\n"
-        value += f"**최근 {recent_total}게임:** {recent_str}\n"
-        value += f"**KDA:** {kda_str}"
-
-        embed.add_field(
-            name=f"{data['riot_id']} (Lv.{data['summoner_level']}){cache_badge}",
-            value=value,
-            inline=False
+                data, is_cached, ai_analysis, _ = results[index]
+                results[index] = (data, is_cached, ai_analysis, False)
+            await show()
+        except Exception as e:
+            print(f"[캐시] {player} 백그라운드 갱신 실패: {e}")
+
+    async def run(index: int, player: str):
+        results[index] = await analyze_player_with_ai(
+            player, force_refresh=force_refresh, allow_stale=True, with_ai=not roster_mode,
+            on_partial=lambda data, is_cached, is_stale, text: stream_partial(index, data, is_cached, is_stale, text)
         )
+        # 끝난 플레이어부터 바로 결과 표시
+        await show()
+        if results[index][3] and roster_mode:
+            # 로스터 AI 분석 전에 끝내야 갱신된 데이터로 한 번에 요청하고 results를 동시에 덮어쓰지 않음
+            await revalidate(index, player)
+        elif results[index][3]:
+            task = asyncio.create_task(revalidate(index, player))
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+
+    # 모든 플레이어를 동시에 분석 (Riot 요청은 공용 rate limiter를 거침)
+    await asyncio.gather(*(run(i, player) for i, player in enumerate(players)))
+
+    if roster_mode:
+        team_summary = await fill_roster_analysis(
+            players, results,
+            on_partial=lambda index, text: stream_partial(index, *results[index][:2], results[index][3], text)
+        )
+        await show()
 
-        # 상세 통계 필드 추가
-        total_stats = data.get("total_stats", {})
-        avg_stats = data.get("avg_stats", {})
-        recent_matches = data.get("recent_matches", [])
-
-        if total_stats and recent_total > 0:
-            # 킬관여율, 팀딜비중 계산
-            kp_list = [m.get("kill_participation", 0) for m in recent_matches if m.get("kill_participation")]
-            tdp_list = [m.get("team_damage_percentage", 0) for m in recent_matches if m.get("team_damage_percentage")]
-            avg_kp = (sum(kp_list) / len(kp_list) * 100) if kp_list else 0
-            avg_tdp = (sum(tdp_list) / len(tdp_list) * 100) if tdp_list else 0
-
-            first_blood_rate = (total_stats.get("first_blood_kills", 0) + total_stats.get("first_blood_assists", 0)) / recent_total * 100
-
-            # 공격성 & 전투 통계
-            combat_value = f"🗡️ **공격성:** 퍼블관여 {first_blood_rate:.0f}% | 솔로킬 {total_stats.get('solo_kills', 0)}회 | 킬관여 {avg_kp:.0f}%\n"
-            combat_value += f"💥 **멀티킬:** 더블 {total_stats.get('double_kills', 0)} | 트리플 {total_stats.get('triple_kills', 0)} | 쿼드라 {total_stats.get('quadra_kills', 0)} | 펜타 {total_stats.get('penta_kills', 0)}\n"
-            combat_value += f"💪 **전투:** 딜 {avg_stats.get('avg_damage', 0):.0f} ({avg_tdp:.0f}%) | 탱킹 {avg_stats.get('avg_damage_taken', 0):.0f} | CC {avg_stats.get('avg_cc_time', 0):.1f}초\n"
-            combat_value += f"📈 **분당:** DPM {avg_stats.get('avg_dpm', 0):.0f} | GPM {avg_stats.get('avg_gpm', 0):.0f}"
-
-            embed.add_field(
-                name=f"⚔️ 전투 통계",
-                value=combat_value,
-                inline=False
-            )
-
-            # 오브젝트 & 시야
-            obj_value = f"🏰 **오브젝트:** 타워 {total_stats.get('turret_kills', 0)} | 플레이트 {total_stats.get('turret_takedowns', 0)} | 용 {total_stats.get('dragon_kills', 0)} | 바론 {total_stats.get('baron_kills', 0)}\n"
-            obj_value += f"🎯 **오브젝트 딜:** 평균 {avg_stats.get('avg_obj_damage', 0):.0f}\n"
-            obj_value += f"👁️ **시야:** 점수 {avg_stats.get('avg_vision_score', 0):.1f} | 와드 {avg_stats.get('avg_wards_placed', 0):.1f} | 제어 {avg_stats.get('avg_control_wards', 0):.1f} | 제거 {total_stats.get('wards_killed', 0)}"
-
-            embed.add_field(
-                name=f"🏛️ 오브젝트 & 시야",
-                value=obj_value,
-                inline=False
-            )
-
-            # 라인전 (타임라인 데이터가 있는 경우)
-            if total_stats.get("games_with_timeline", 0) > 0:
-                lane_value = f"📊 **10분 기준** (최근 {total_stats['games_with_timeline']}게임)\n"
-                lane_value += f"CS: {avg_stats.get('avg_cs_at_10', 0):.0f} | 골드: {avg_stats.get('avg_gold_at_10', 0):.0f}\n"
-                lane_value += f"초반 킬: {avg_stats.get('avg_early_kills', 0):.1f} | 초반 데스: {avg_stats.get('avg_early_deaths', 0):.1f}"
-
-                embed.add_field(
-                    name=f"🛡️ 라인전",
-                    value=lane_value,
-                    inline=True
-                )
-
-            # 스킬샷 통계 (있는 경우에만)
-            if total_stats.get("skillshots_hit", 0) > 0 or total_stats.get("skillshots_dodged", 0) > 0:
-                skill_value = f"명중: {total_stats.get('skillshots_hit', 0)} | 회피: {total_stats.get('skillshots_dodged', 0)}"
-                embed.add_field(
-                    name=f"🎯 스킬샷",
-                    value=skill_value,
-                    inline=True
-                )
-
-        # 도전과제 정보 표시
-        challenges_data = data.get("challenges_data")
-        if challenges_data:
-            total_points = challenges_data.get("totalPoints", {})
-            level = total_points.get("level", "NONE")
-            current_pts = total_points.get("current", 0)
-            percentile = total_points.get("percentile", 0) * 100
-
-            challenge_emoji = {"IRON": "🔩", "BRONZE": "🥉", "SILVER": "🥈", "GOLD": "🥇",
-                               "PLATINUM": "💎", "DIAMOND": "💠", "MASTER": "🏆",
-                               "GRANDMASTER": "🔥", "CHALLENGER": "👑", "NONE": "⚪"}
-
-            embed.add_field(
-                name=f"🏅 도전과제",
-                value=f"{challenge_emoji.get(level, '⚪')} {level}\n{current_pts:,}점 (상위 {percentile:.1f}%)",
-                inline=True
-            )
-
-        # AI 분석 (Gemini) - 캐시된 경우 캐시된 AI 분석 사용
-        if gemini_client:
-            if is_cached and cached_ai:
-                ai_analysis = cached_ai
-            else:
-                ai_analysis = await generate_ai_analysis(data)
-                # 새로 분석한 경우 캐시에 저장
-                if not is_cached and ai_analysis:
-                    set_cached_player(player_name, data, ai_analysis)
-
-            if ai_analysis:
-                embed.add_field(
-                    name=f"🤖 AI 분석",
-                    value=f"```{ai_analysis[:900]}```",
-                    inline=False
-                )
-        elif not is_cached:
-            # AI 분석 없이 캐시 저장
-            set_cached_player(player_name, data, None)
-
-    embed.set_footer(text="📦=캐시(7일) | 새로고침: !analyze refresh 닉네임#태그")
-    await processing_msg.edit(content=None, embed=embed)
+    stats = player_cache.stats()
+    print(f"[캐시] 메모리 히트 {stats['memory_hits']} | 디스크 히트 {stats['disk_hits']} | 미스 {stats['misses']} "
+          f"| 메모리 {stats['memory_entries']}개 ({stats['memory_bytes'] / 1024:.0f}KB)")
 
 
 @bot.command(name="live")
@@ -1156,6 +1559,10 @@ async def live_cmd(ctx, *, riot_id: str = None):
         game_name = riot_id
         tag_line = "KR1"
 
+    if not await ensure_champion_map():
+        await ctx.send("❌ 챔피언 데이터를 불러오지 못했습니다. 잠시 후 다시 시도해주세요.")
+        return
+
     processing_msg = await ctx.send(f"🔄 {game_name}#{tag_line} 게임 조회 중...")
 
     # 계정 정보 조회
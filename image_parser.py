@@ -1,15 +1,35 @@
 
 import os
+import io
 import json
-import base64
+import asyncio
 import aiohttp
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
+from llm_cache import LLMCache, make_key
+
+# Pillow는 선택 사항 (없으면 이미지를 그대로 전송)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 load_dotenv()
 
 # Gemini 클라이언트
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Gemini 응답 캐시 (같은 이미지 + 프롬프트면 API를 다시 호출하지 않음)
+llm_cache = LLMCache()
+
+# 전송 전 이미지 축소/자르기 (Pillow가 설치된 경우에만)
+# IMAGE_MAX_WIDTH: 이 폭보다 크면 비율 유지하며 축소 (기본 0 = 축소 안 함, 예: 1600)
+# IMAGE_CROP_BOX: 점수판 영역 "왼쪽,위,오른쪽,아래" (이미지 크기 대비 비율, 예: 0.05,0.1,0.95,0.9)
+IMAGE_MAX_WIDTH = int(os.getenv("IMAGE_MAX_WIDTH", "0"))
+IMAGE_CROP_BOX = tuple(float(v) for v in os.getenv("IMAGE_CROP_BOX", "").split(",") if v.strip()) or None
+IMAGE_JPEG_QUALITY = 90
 
 # 분석 프롬프트
 ANALYSIS_PROMPT = """이 이미지는 리그 오브 레전드 게임 결과 화면입니다.
@@ -251,37 +271,67 @@ MVP/SVP 점수 계산 방식:
 """
 
 async def download_image_bytes(url: str) -> bytes:
-    """이미지 URL에서 바이트 다운로드"""
+    """이미지 URL에서 바이트 다운로드 (첨부 파일 바이트가 없는 예전 작업용)"""
     async with aiohttp.ClientSession() as session:
         async with session.get(url) as response:
             if response.status == 200:
                 return await response.read()
     return None
 
-async def parse_game_image(image_url: str) -> dict:
-    """Gemini Vision으로 게임 결과 이미지 분석"""
+def prepare_image(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """
+    점수판 영역만 잘라내고 너무 큰 이미지는 축소 (업로드 크기 / 분석 시간 절약)
+    Pillow가 없거나 바꿀 것이 없으면 원본 바이트를 그대로 반환
+    """
+    if Image is None or (not IMAGE_CROP_BOX and not IMAGE_MAX_WIDTH):
+        return image_bytes, mime_type
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        width, height = image.size
+        crop = None
+        if IMAGE_CROP_BOX and len(IMAGE_CROP_BOX) == 4:
+            left, top, right, bottom = IMAGE_CROP_BOX
+            crop = (int(width * left), int(height * top), int(width * right), int(height * bottom))
+            width, height = crop[2] - crop[0], crop[3] - crop[1]
+        scale = IMAGE_MAX_WIDTH / width if IMAGE_MAX_WIDTH and width > IMAGE_MAX_WIDTH else 1
+        if crop is None and scale == 1:
+            return image_bytes, mime_type
+
+        if crop is not None:
+            image = image.crop(crop)
+        if scale != 1:
+            image = image.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=IMAGE_JPEG_QUALITY)
+    print(f"[DEBUG] 이미지 축소: {len(image_bytes):,}B → {output.getbuffer().nbytes:,}B")
+    return output.getvalue(), "image/jpeg"
+
+async def parse_game_image(image_bytes: bytes, mime_type: str = "image/png") -> dict:
+    """
+    Gemini Vision으로 게임 결과 이미지 분석
+    image_bytes: 디스코드 첨부 파일 바이트 (attachment.read()) - base64 변환 없이 그대로 전달
+    """
     try:
-        # 이미지 다운로드
-        image_bytes = await download_image_bytes(image_url)
         if not image_bytes:
-            print("[ERROR] 이미지 다운로드 실패")
+            print("[ERROR] 이미지 데이터 없음")
             return None
 
+        # 축소/자르기는 CPU 작업이라 스레드에서
+        image_bytes, mime_type = await asyncio.to_thread(prepare_image, image_bytes, mime_type)
+
+        # 같은 이미지를 이미 분석했으면 캐시된 응답 사용
+        cache_key = make_key(GEMINI_MODEL, ANALYSIS_PROMPT, image_bytes)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            print("[DEBUG] Gemini 응답 캐시 히트")
+            return build_result(cached)
+
         # Gemini API 호출
         response = await client.aio.models.generate_content(
-            model="gemini-2.0-flash",
+            model=GEMINI_MODEL,
             contents=[
-                {
-                    "parts": [
-                        {"text": ANALYSIS_PROMPT},
-                        {
-                            "inline_data": {
-                                "mime_type": "image/png",
-                                "data": base64.b64encode(image_bytes).decode('utf-8')
-                            }
-                        }
-                    ]
-                }
+                ANALYSIS_PROMPT,
+                types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
             ]
         )
 
@@ -289,18 +339,9 @@ async def parse_game_image(image_url: str) -> dict:
         content = response.text.strip()
         print(f"[DEBUG] Gemini 응답:\n{content}")
 
-        # JSON 파싱 (코드 블록 제거)
-        content = extract_json_from_response(content)
-        result = json.loads(content)
-
-        # 데이터 검증 및 보정
-        if not validate_result(result):
-            print("[WARNING] 데이터 검증 실패, 기본값으로 채움")
-            result = fill_missing_data(result)
-
-        # 파생 통계 계산
-        result = calculate_derived_stats(result)
-
+        result = build_result(content)
+        # JSON 파싱에 성공한 응답만 캐시
+        llm_cache.put(cache_key, GEMINI_MODEL, content)
         return result
 
     except json.JSONDecodeError as e:
@@ -310,6 +351,19 @@ async def parse_game_image(image_url: str) -> dict:
         print(f"[ERROR] 이미지 분석 실패: {e}")
         return None
 
+def build_result(content: str) -> dict:
+    """Gemini 응답 텍스트 → 검증/보정된 결과 (JSON이 아니면 JSONDecodeError)"""
+    # JSON 파싱 (코드 블록 제거)
+    result = json.loads(extract_json_from_response(content))
+
+    # 데이터 검증 및 보정
+    if not validate_result(result):
+        print("[WARNING] 데이터 검증 실패, 기본값으로 채움")
+        result = fill_missing_data(result)
+
+    # 파생 통계 계산
+    return calculate_derived_stats(result)
+
 def extract_json_from_response(content: str) -> str:
     """응답에서 JSON 부분만 추출"""
     if content.startswith("```"):
@@ -470,19 +524,10 @@ def test_local_image_sync(image_path: str):
         image_bytes = f.read()
 
     response = client.models.generate_content(
-        model="gemini-2.0-flash",
+        model=GEMINI_MODEL,
         contents=[
-            {
-                "parts": [
-                    {"text": ANALYSIS_PROMPT},
-                    {
-                        "inline_data": {
-                            "mime_type": "image/png",
-                            "data": base64.b64encode(image_bytes).decode('utf-8')
-                        }
-                    }
-                ]
-            }
+            ANALYSIS_PROMPT,
+            types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
         ]
     )
 
@@ -0,0 +1,178 @@
+
+# job_queue.py
+import json
+import sqlite3
+import threading
+import time
+
+QUEUE_FILE = "parse_jobs.db"  # 실행 위치 기준 (haze_latte의 경기 기록 파일과 같은 폴더)
+FINISHED_TTL_SECONDS = 7 * 24 * 60 * 60  # 끝난 작업 보관 기간
+
+# 작업 상태
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ParseJobQueue:
+    """
+    스크린샷 분석 작업 큐 (SQLite, WAL 모드)
+    - !register가 작업을 넣고, 워커가 claim()으로 하나씩 가져가 처리
+    - 실패한 작업은 next_run_at을 미뤄 다시 대기 (재시도 간격은 호출하는 쪽에서 결정)
+    - 봇이 재시작되면 처리 중이던 작업을 reset_running()으로 대기 상태로 되돌림
+    - 한 번에 올린 스크린샷들은 같은 batch_id로 묶어 batch_jobs()로 한꺼번에 조회
+    - 첨부 파일 바이트를 함께 저장해 재시작 후에도 다시 내려받지 않음 (작업이 끝나면 비움)
+    """
+
+    def __init__(self, path: str = QUEUE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS parse_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                message_id INTEGER,
+                status_message_id INTEGER,
+                batch_id INTEGER,
+                image_url TEXT NOT NULL,
+                image BLOB,
+                mime_type TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_run_at REAL NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # 이전 버전에서 만든 파일에 없는 열 추가
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(parse_jobs)")}
+        for name, kind in (("batch_id", "INTEGER"), ("image", "BLOB"), ("mime_type", "TEXT")):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE parse_jobs ADD COLUMN {name} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_jobs_status ON parse_jobs (status, next_run_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_jobs_batch ON parse_jobs (batch_id)")
+        self._conn.commit()
+
+    def enqueue(self, channel_id: int, author_id: int, image_url: str,
+                message_id: int | None = None, status_message_id: int | None = None,
+                batch_id: int | None = None, image: bytes | None = None,
+                mime_type: str | None = None) -> int:
+        """작업 추가 후 작업 번호 반환"""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO parse_jobs (channel_id, author_id, message_id, status_message_id, batch_id, "
+                    "image_url, image, mime_type, status, next_run_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (channel_id, author_id, message_id, status_message_id, batch_id,
+                     image_url, image, mime_type, PENDING, now, now, now)
+                )
+        return cursor.lastrowid
+
+    def claim(self) -> dict | None:
+        """실행할 차례가 된 가장 오래된 작업을 running으로 바꾸고 반환 (없으면 None)"""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT * FROM parse_jobs WHERE status = ? AND next_run_at <= ? ORDER BY id LIMIT 1",
+                    (PENDING, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE parse_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (RUNNING, now, row["id"])
+                )
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: int, result: dict) -> None:
+        """분석 성공"""
+        self._finish(job_id, DONE, result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: int, error: str) -> None:
+        """재시도 없이 실패 처리"""
+        self._finish(job_id, FAILED, error=error)
+
+    def retry(self, job_id: int, error: str, delay: float) -> None:
+        """delay초 뒤에 다시 실행되도록 대기 상태로 되돌림"""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE parse_jobs SET status = ?, error = ?, next_run_at = ?, updated_at = ? WHERE id = ?",
+                    (PENDING, error, now + delay, now, job_id)
+                )
+
+    def _finish(self, job_id: int, status: str, result: str | None = None, error: str | None = None) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE parse_jobs SET status = ?, result = ?, error = ?, image = NULL, updated_at = ? WHERE id = ?",
+                    (status, result, error, time.time(), job_id)
+                )
+
+    def batch_jobs(self, batch_id: int) -> list[dict]:
+        """같은 묶음의 작업 목록 (등록 순서, 완료된 작업은 result를 dict로 변환)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM parse_jobs WHERE batch_id = ? ORDER BY id", (batch_id,)
+            ).fetchall()
+        jobs = [dict(row) for row in rows]
+        for job in jobs:
+            if job["result"] is not None:
+                job["result"] = json.loads(job["result"])
+        return jobs
+
+    def reset_running(self) -> int:
+        """재시작 시 running으로 남은 작업을 대기 상태로 되돌리고 개수 반환"""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE parse_jobs SET status = ?, next_run_at = ?, updated_at = ? WHERE status = ?",
+                    (PENDING, time.time(), time.time(), RUNNING)
+                )
+        return cursor.rowcount
+
+    def seconds_until_next(self) -> float | None:
+        """다음 대기 작업까지 남은 시간 (대기 작업이 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_run_at) FROM parse_jobs WHERE status = ?", (PENDING,)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def pending_count(self) -> int:
+        """대기 + 처리 중인 작업 수"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM parse_jobs WHERE status IN (?, ?)", (PENDING, RUNNING)
+            ).fetchone()
+        return row[0]
+
+    def delete_finished(self, max_age_seconds: float = FINISHED_TTL_SECONDS) -> int:
+        """끝난 지 오래된 작업 정리"""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM parse_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                    (DONE, FAILED, time.time() - max_age_seconds)
+                )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+
+# llm_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "llm_cache.db"  # 실행 위치 기준 (onefile 빌드의 임시 폴더에 두면 재시작마다 사라짐)
+CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_DAYS", "7")) * 24 * 60 * 60
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024
+ACCESS_FLUSH_SECONDS = 60  # 조회 시각을 모아서 디스크에 반영하는 주기
+ACCESS_FLUSH_MAX = 500  # 이만큼 쌓이면 주기와 상관없이 반영
+
+
+def make_key(model: str, *parts: str | bytes) -> str:
+    """모델 + 프롬프트(+ 이미지 바이트)의 SHA-256 해시"""
+    digest = hashlib.sha256(model.encode("utf-8"))
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        # 경계가 섞이지 않도록 길이를 먼저 넣음
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Gemini 응답 영구 캐시 (SQLite, WAL 모드)
+    - 키는 make_key()로 만든 모델 + 입력 해시, 같은 입력이면 API를 다시 호출하지 않음
+    - ttl_seconds가 지난 응답은 무시하고, 전체 크기가 max_bytes를 넘으면 오래 안 쓴 것부터 삭제 (LRU)
+    - 조회 시각은 메모리에 모아 두었다가 주기적으로 / 저장 시 한 번에 반영 (조회마다 쓰지 않음)
+    - haze_yum / haze_latte가 같은 파일을 함께 사용
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses (last_access)")
+        self._conn.commit()
+        self._pending_access: dict[str, float] = {}  # 아직 반영하지 않은 조회 시각
+        self._flushed_at = time.time()
+
+    def get(self, key: str) -> str | None:
+        """캐시된 응답 조회 (TTL이 지났으면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_responses WHERE cache_key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._pending_access[key] = now
+            if len(self._pending_access) >= ACCESS_FLUSH_MAX or now - self._flushed_at >= ACCESS_FLUSH_SECONDS:
+                with self._conn:
+                    self._flush_access()
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        """응답 저장 후 만료 항목 / 용량 초과분 정리"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (cache_key, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now)
+                )
+                self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._pending_access.pop(key, None)
+                # 최근 조회 시각을 반영한 뒤에 정리해야 LRU 순서가 맞음
+                self._flush_access()
+                self._evict()
+
+    def _flush_access(self) -> None:
+        """모아 둔 조회 시각을 한 번에 반영 (lock 안에서 호출, commit은 호출하는 쪽에서)"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE llm_responses SET last_access = ? WHERE cache_key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._flushed_at = time.time()
+
+    def _evict(self) -> None:
+        """용량 제한을 넘으면 오래 안 쓴 항목부터 삭제 (lock 안에서 호출)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 매번 정리하지 않도록 여유분(10%)까지 비움
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT cache_key, size FROM llm_responses ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+            total -= size
+            evicted += 1
+        print(f"[LLM 캐시] 용량 초과로 {evicted}개 정리됨")
+
+    def close(self) -> None:
+        with self._lock:
+            with self._conn:
+                self._flush_access()
+            self._conn.close()
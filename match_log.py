@@ -0,0 +1,162 @@
+
+# match_log.py
+import json
+import os
+import threading
+
+
+class MatchLog:
+    """
+    스크림 경기 기록 (추가 전용 JSONL, 한 줄 = 경기 1개)
+    - 저장은 파일 끝에 한 줄 추가 + fsync (기존 기록을 다시 쓰지 않음)
+    - 쓰는 도중 꺼져서 마지막 줄이 잘렸으면 열 때 잘린 줄만 잘라냄 (이전 기록은 그대로)
+    - 예전 scrim_data.json은 import_json()으로 한 번만 옮김
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._repair()
+
+    def _repair(self) -> None:
+        """마지막 줄이 줄바꿈 없이 끝나면(쓰다 만 기록) 잘라냄"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            content = f.read()
+            end = content.rfind(b"\n") + 1
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"[경기 기록] 잘린 마지막 기록 제거 ({size - end}B)")
+
+    def append(self, match: dict) -> None:
+        """경기 1개 추가"""
+        self.append_many([match])
+
+    def append_many(self, matches: list[dict]) -> None:
+        """경기 여러 개를 한 번의 쓰기로 추가"""
+        if not matches:
+            return
+        data = "".join(json.dumps(match, ensure_ascii=False) + "\n" for match in matches).encode("utf-8")
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read_all(self) -> list[dict]:
+        """전체 기록 (저장 순서)"""
+        return self.read_from(0)[0]
+
+    def read_from(self, offset: int) -> tuple[list[dict], int]:
+        """
+        offset 바이트 위치부터 읽은 경기 목록과 다음에 읽을 위치
+        (완전히 쓰인 줄까지만 읽음)
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        with self._lock:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                content = f.read()
+        end = content.rfind(b"\n") + 1
+        matches = []
+        for line in content[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                matches.append(json.loads(line))
+            except json.JSONDecodeError:
+                print("[경기 기록] 읽을 수 없는 줄 건너뜀")
+        return matches, offset + end
+
+    def import_json(self, legacy_path: str) -> int:
+        """
+        예전 JSON 파일({"matches": [...]})을 기록으로 옮김 (기록 파일이 이미 있으면 아무것도 안 함)
+        임시 파일에 다 쓴 뒤 이름을 바꿔서, 중간에 꺼져도 반쯤 옮겨진 기록이 남지 않음
+        """
+        if os.path.exists(self.path) or not os.path.exists(legacy_path):
+            return 0
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            matches = json.loads(content).get("matches", []) if content else []
+        except (json.JSONDecodeError, IOError) as e:
+            # 예전 파일은 그대로 두고 빈 기록으로 시작
+            print(f"[경기 기록] {legacy_path} 읽기 오류로 가져오지 않음: {e}")
+            return 0
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            for match in matches:
+                f.write((json.dumps(match, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        print(f"[경기 기록] {legacy_path}에서 {len(matches)}경기 가져옴")
+        return len(matches)
+
+
+class MatchRepository:
+    """
+    경기 기록 메모리 캐시 (프로세스 전체에서 하나)
+    - 처음 한 번만 파일 전체를 읽고, 이후에는 메모리의 목록을 그대로 반환
+    - 파일 크기 / 수정 시각이 바뀐 경우에만 다시 읽음
+      (뒤에 추가만 됐으면 추가된 부분만, 그 외에는 전체)
+    - record가 있으면 읽은 경기마다 한 번만 적용해 보관 (예: MatchRecord)
+    - 반환하는 목록은 공유 객체이므로 읽기만 할 것
+    """
+
+    def __init__(self, log: MatchLog, record=None):
+        self.log = log
+        self.record = record
+        self._matches: list[dict] = []
+        self._offset = 0  # 다음에 읽을 바이트 위치
+        self._stat: tuple[int, int] | None = None  # 마지막으로 읽은 시점의 (크기, 수정 시각)
+
+    def _file_stat(self) -> tuple[int, int]:
+        try:
+            st = os.stat(self.log.path)
+        except FileNotFoundError:
+            return 0, 0
+        return st.st_size, st.st_mtime_ns
+
+    def _read_from(self, offset: int) -> tuple[list, int]:
+        matches, offset = self.log.read_from(offset)
+        if self.record is not None:
+            matches = [self.record(match) for match in matches]
+        return matches, offset
+
+    def refresh(self) -> None:
+        """파일이 바뀌었으면 다시 읽기"""
+        stat = self._file_stat()
+        if stat == self._stat:
+            return
+        if self._stat is not None and stat[0] > self._stat[0]:
+            # 뒤에 추가된 부분만 읽음
+            matches, self._offset = self._read_from(self._offset)
+            self._matches.extend(matches)
+        else:
+            # 처음이거나 크기가 그대로/줄었는데 수정됨 (교체/정리) → 전체 다시 읽기
+            self._matches, self._offset = self._read_from(0)
+            print(f"[경기 기록] {len(self._matches)}경기 불러옴")
+        self._stat = stat
+
+    def matches(self) -> list[dict]:
+        """전체 경기 (저장 순서)"""
+        self.refresh()
+        return self._matches
+
+    def add(self, matches: list[dict]) -> None:
+        """기록에 추가하고 메모리 목록도 갱신 (추가된 부분만 읽음)"""
+        self.log.append_many(matches)
+        self.refresh()
@@ -0,0 +1,119 @@
+
+# match_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+STORE_FILE = "match_store.db"  # 실행 위치 기준 (onefile 빌드의 임시 폴더에 두면 재시작마다 사라짐)
+STORE_MAX_BYTES = int(os.getenv("MATCH_STORE_MAX_MB", "200")) * 1024 * 1024
+ACCESS_FLUSH_SECONDS = 60  # 조회 시각을 모아서 디스크에 반영하는 주기
+ACCESS_FLUSH_MAX = 500  # 이만큼 쌓이면 주기와 상관없이 반영
+
+
+class MatchStore:
+    """
+    match-v5 응답 영구 저장소 (match_id 기준)
+    - 매치/타임라인은 끝난 게임이라 바뀌지 않으므로 한 번 받으면 다시 받을 필요가 없음
+    - JSON을 zlib으로 압축해 SQLite에 저장
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 조회되지 않은 항목부터 삭제 (LRU)
+    - 조회 시각은 메모리에 모아 두었다가 주기적으로 / 저장·정리 직전에 한 번에 반영 (조회마다 쓰지 않음)
+    """
+
+    def __init__(self, path: str = STORE_FILE, max_bytes: int = STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS match_payloads (
+                match_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (match_id, kind)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_match_payloads_access ON match_payloads (last_access)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM match_payloads").fetchone()
+        self.total_bytes = row[0]
+        self._pending_access: dict[tuple[str, str], float] = {}  # 아직 반영하지 않은 조회 시각
+        self._flushed_at = time.time()
+
+    def get(self, match_id: str, kind: str = "match") -> dict | None:
+        """저장된 매치(kind="match") 또는 타임라인(kind="timeline") 조회"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM match_payloads WHERE match_id = ? AND kind = ?", (match_id, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._pending_access[(match_id, kind)] = now
+            if len(self._pending_access) >= ACCESS_FLUSH_MAX or now - self._flushed_at >= ACCESS_FLUSH_SECONDS:
+                self._flush_access()
+                self._conn.commit()
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, json.JSONDecodeError) as e:
+            print(f"[매치 저장소] {match_id} ({kind}) 읽기 오류: {e}")
+            return None
+
+    def put(self, match_id: str, data: dict, kind: str = "match") -> None:
+        """매치/타임라인 저장 후 용량 초과 시 LRU 정리"""
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM match_payloads WHERE match_id = ? AND kind = ?", (match_id, kind)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO match_payloads (match_id, kind, payload, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (match_id, kind, payload, len(payload), time.time())
+            )
+            self.total_bytes += len(payload) - (old[0] if old else 0)
+            self._pending_access.pop((match_id, kind), None)
+            if self.total_bytes > self.max_bytes:
+                # 최근 조회 시각을 반영한 뒤에 정리해야 LRU 순서가 맞음
+                self._flush_access()
+            self._evict()
+            self._conn.commit()
+
+    def _flush_access(self) -> None:
+        """모아 둔 조회 시각을 한 번에 반영 (lock 안에서 호출, commit은 호출하는 쪽에서)"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE match_payloads SET last_access = ? WHERE match_id = ? AND kind = ?",
+                [(accessed_at, match_id, kind) for (match_id, kind), accessed_at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._flushed_at = time.time()
+
+    def _evict(self) -> None:
+        """용량 제한을 넘으면 오래된 항목부터 삭제 (lock 안에서 호출)"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        # 매번 정리하지 않도록 여유분(10%)까지 비움
+        target = self.max_bytes * 0.9
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT match_id, kind, size FROM match_payloads ORDER BY last_access ASC"
+        ).fetchall()
+        for match_id, kind, size in rows:
+            if self.total_bytes <= target:
+                break
+            self._conn.execute("DELETE FROM match_payloads WHERE match_id = ? AND kind = ?", (match_id, kind))
+            self.total_bytes -= size
+            evicted += 1
+        print(f"[매치 저장소] 용량 초과로 {evicted}개 정리됨 ({self.total_bytes / 1024 / 1024:.1f}MB)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,209 @@
+
+# match_table.py
+import base64
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from itertools import compress
+
+# 테이블 형식 버전 (열 구성이 바뀌면 올려서 캐시를 다시 만들게 함)
+# 1: 열 목록 JSON, 2: 임베드/AI에서 읽는 열만 남기고 바이너리로 압축
+TABLE_VERSION = 2
+READABLE_VERSIONS = (1, TABLE_VERSION)
+
+# 정수 열 (bool은 0/1, 32비트)
+INT_COLUMNS = [
+    "win", "kills", "deaths", "assists", "damage", "vision_score",
+    "turret_kills", "turret_takedowns", "dragon_kills", "baron_kills",
+    "first_blood_kill", "first_blood_assist",
+    "double_kills", "triple_kills", "quadra_kills", "penta_kills",
+    "damage_to_objectives", "damage_self_mitigated", "total_damage_taken", "time_ccing_others",
+    "wards_placed", "wards_killed", "control_wards_placed",
+    "skillshots_dodged", "skillshots_hit", "solo_kills",
+]
+
+# 실수 열 (32비트 - 표시 정밀도에 충분)
+FLOAT_COLUMNS = ["damage_per_minute", "gold_per_minute", "kill_participation", "team_damage_percentage"]
+
+# 문자열 열
+TEXT_COLUMNS = ["match_id", "champion", "position"]
+
+# 테이블에 남기는 타임라인 지표
+TIMELINE_FIELDS = [
+    "early_kills", "early_deaths", "cs_at_10", "gold_at_10", "solo_kills",
+    "lane_kills", "roam_kills", "ganks_received", "jungle_invades",
+]
+
+# 타임라인 열 (타임라인이 없는 게임은 0, has_timeline으로 구분)
+TIMELINE_COLUMNS = ["has_timeline"] + [f"tl_{field}" for field in TIMELINE_FIELDS]
+
+# 바이너리 형식: 헤더(버전, 행 수) + 숫자 열(리틀 엔디언) + 문자열 열(길이 + NUL로 구분한 UTF-8)
+HEADER = struct.Struct("<BH")
+TEXT_LENGTH = struct.Struct("<I")
+
+
+class MatchTable:
+    """
+    한 플레이어의 최근 게임 기록 (열 단위 저장)
+    - 스탯 하나당 배열 하나 (행 = 게임, 최신 게임이 앞)
+    - 합계/평균/챔피언별 집계는 열 단위 연산으로 계산
+    - 캐시에는 열을 이어 붙인 바이너리를 압축해서 저장 (pack / unpack)
+    """
+
+    __slots__ = ("columns", "text")
+
+    def __init__(self):
+        self.columns: dict[str, array] = {name: array("i") for name in INT_COLUMNS + TIMELINE_COLUMNS}
+        self.columns.update({name: array("f") for name in FLOAT_COLUMNS})
+        self.text: dict[str, list[str]] = {name: [] for name in TEXT_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.text["match_id"])
+
+    # ---------- 생성 / 변환 ----------
+    @classmethod
+    def from_entries(cls, entries: list[dict]) -> "MatchTable":
+        """match_entry 목록으로 테이블 생성"""
+        table = cls()
+        for entry in entries:
+            table.append(entry)
+        return table
+
+    def append(self, entry: dict) -> None:
+        """match_entry 1개를 행으로 추가"""
+        for name in INT_COLUMNS:
+            self.columns[name].append(int(entry.get(name) or 0))
+        for name in FLOAT_COLUMNS:
+            self.columns[name].append(float(entry.get(name) or 0))
+        for name in TEXT_COLUMNS:
+            self.text[name].append(entry.get(name) or "")
+        timeline = entry.get("timeline") or {}
+        self.columns["has_timeline"].append(1 if timeline else 0)
+        for field in TIMELINE_FIELDS:
+            self.columns[f"tl_{field}"].append(int(timeline.get(field) or 0))
+
+    def row(self, index: int) -> dict:
+        """행 1개를 match_entry 형태로 변환"""
+        entry = {name: self.text[name][index] for name in TEXT_COLUMNS}
+        entry.update({name: self.columns[name][index] for name in INT_COLUMNS + FLOAT_COLUMNS})
+        for name in ("win", "first_blood_kill", "first_blood_assist"):
+            entry[name] = bool(entry[name])
+        entry["timeline"] = (
+            {field: self.columns[f"tl_{field}"][index] for field in TIMELINE_FIELDS}
+            if self.columns["has_timeline"][index] else {}
+        )
+        return entry
+
+    def take(self, indices: list[int]) -> "MatchTable":
+        """지정한 행만 순서대로 뽑은 새 테이블"""
+        table = MatchTable()
+        for name, column in self.columns.items():
+            table.columns[name] = array(column.typecode, (column[i] for i in indices))
+        for name, values in self.text.items():
+            table.text[name] = [values[i] for i in indices]
+        return table
+
+    def extend(self, other: "MatchTable") -> None:
+        """다른 테이블의 행을 뒤에 붙이기"""
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+        for name, values in self.text.items():
+            values.extend(other.text[name])
+
+    def clear_timeline(self, start: int) -> None:
+        """start번째 행부터 타임라인 값 비우기"""
+        for name in TIMELINE_COLUMNS:
+            column = self.columns[name]
+            for i in range(start, len(column)):
+                column[i] = 0
+
+    def pack(self) -> bytes:
+        """바이너리로 직렬화 (zlib 압축)"""
+        parts = [HEADER.pack(TABLE_VERSION, len(self))]
+        for name in INT_COLUMNS + TIMELINE_COLUMNS + FLOAT_COLUMNS:
+            column = self.columns[name]
+            if sys.byteorder != "little":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        for name in TEXT_COLUMNS:
+            encoded = "\0".join(self.text[name]).encode("utf-8")
+            parts.append(TEXT_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        return zlib.compress(b"".join(parts), 9)
+
+    @classmethod
+    def unpack(cls, packed: bytes) -> "MatchTable":
+        """pack()의 역변환"""
+        raw = zlib.decompress(packed)
+        version, rows = HEADER.unpack_from(raw)
+        if version != TABLE_VERSION:
+            raise ValueError(f"지원하지 않는 테이블 버전: {version}")
+        table = cls()
+        offset = HEADER.size
+        for name in INT_COLUMNS + TIMELINE_COLUMNS + FLOAT_COLUMNS:
+            column = table.columns[name]
+            size = rows * column.itemsize
+            column.frombytes(raw[offset:offset + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            offset += size
+        for name in TEXT_COLUMNS:
+            (length,) = TEXT_LENGTH.unpack_from(raw, offset)
+            offset += TEXT_LENGTH.size
+            text = raw[offset:offset + length].decode("utf-8")
+            offset += length
+            table.text[name] = text.split("\0") if rows else []
+        return table
+
+    def to_payload(self) -> dict:
+        """캐시 저장용 (JSON 안에 넣을 수 있도록 바이너리를 base64로)"""
+        return {"version": TABLE_VERSION, "packed": base64.b64encode(self.pack()).decode("ascii")}
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "MatchTable":
+        """to_payload() 결과로 복원 (버전 1의 열 목록 형식도 읽음)"""
+        if "packed" in payload:
+            return cls.unpack(base64.b64decode(payload["packed"]))
+        table = cls()
+        for name, column in table.columns.items():
+            column.extend(int(v) if column.typecode == "i" else float(v) for v in payload["columns"][name])
+        for name in TEXT_COLUMNS:
+            table.text[name] = list(payload["text"][name])
+        return table
+
+    # ---------- 집계 ----------
+    def total(self, name: str) -> int | float:
+        """열 합계"""
+        return sum(self.columns[name])
+
+    def count_nonzero(self, name: str) -> int:
+        """값이 0이 아닌 행 수"""
+        column = self.columns[name]
+        return len(column) - column.count(0)
+
+    def mean_nonzero(self, name: str) -> float:
+        """값이 있는(0이 아닌) 행의 평균 (없으면 0)"""
+        count = self.count_nonzero(name)
+        return self.total(name) / count if count else 0
+
+    def sum_where(self, name: str, mask: list) -> int | float:
+        """mask가 참인 행의 합계"""
+        return sum(compress(self.columns[name], mask))
+
+    def counts(self, key: str) -> Counter:
+        """문자열 열의 값별 행 수 (처음 나온 순서 유지)"""
+        return Counter(self.text[key])
+
+    def group_by(self, key: str, names: list[str]) -> dict[str, dict]:
+        """문자열 열 기준 그룹별 합계 ({값: {"games": n, 열: 합계}}, 처음 나온 순서 유지)"""
+        groups = {}
+        for value in self.text[key]:
+            if value not in groups:
+                groups[value] = [v == value for v in self.text[key]]
+        return {
+            value: {"games": sum(mask), **{name: self.sum_where(name, mask) for name in names}}
+            for value, mask in groups.items()
+        }
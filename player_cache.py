@@ -0,0 +1,169 @@
+
+# player_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class PlayerCache:
+    """
+    yum 플레이어 캐시 (SQLite, WAL 모드)
+    - Riot ID(정규화된 키)당 1행, 만료는 인덱스가 걸린 cached_at으로 판단
+    - 조회/저장은 키 단위로 처리되어 전체 파일을 다시 읽거나 쓰지 않음
+    - 기존 player_cache.json은 처음 한 번만 가져옴
+    - 앞단에 메모리 LRU(항목 수 + 바이트 크기 제한)를 두어 같은 선수를 반복 조회할 때 디스크를 읽지 않음
+    """
+
+    def __init__(self, path: str, legacy_json_path: str | None = None, expiry_seconds: float | None = None,
+                 memory_max_entries: int = 256, memory_max_bytes: int = 32 * 1024 * 1024):
+        self.path = path
+        self.expiry_seconds = expiry_seconds
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+        # key -> (cached_at, data, ai_analysis, size)
+        self._memory: OrderedDict[str, tuple[float, dict, str | None, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0  # 메모리 히트
+        self.disk_hits = 0  # 디스크 히트
+        self.misses = 0  # 캐시 없음
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS players (
+                cache_key TEXT PRIMARY KEY,
+                cached_at REAL NOT NULL,
+                cached_date TEXT NOT NULL,
+                data TEXT NOT NULL,
+                ai_analysis TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_players_cached_at ON players (cached_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        if legacy_json_path:
+            self._migrate_json(legacy_json_path)
+
+    def _migrate_json(self, json_path: str) -> None:
+        """기존 JSON 캐시를 한 번만 가져옴"""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+            if done or not os.path.exists(json_path):
+                return
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                legacy = json.loads(content) if content else {}
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"[캐시] JSON 마이그레이션 실패: {e}")
+                return
+
+            rows = [
+                (
+                    key,
+                    entry.get("cached_at", 0),
+                    entry.get("cached_date", ""),
+                    json.dumps(entry.get("data"), ensure_ascii=False, separators=(",", ":")),
+                    entry.get("ai_analysis"),
+                )
+                for key, entry in legacy.items()
+                if isinstance(entry, dict) and entry.get("data") is not None
+            ]
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO players (cache_key, cached_at, cached_date, data, ai_analysis) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+            print(f"[캐시] 기존 JSON 캐시 {len(rows)}개 이전 완료")
+
+    def _is_expired(self, cached_at: float) -> bool:
+        return self.expiry_seconds is not None and time.time() - cached_at > self.expiry_seconds
+
+    def _remember(self, key: str, cached_at: float, data: dict, ai_analysis: str | None, size: int) -> None:
+        """메모리 LRU에 저장 (lock 안에서 호출)"""
+        self._forget(key)
+        if size > self.memory_max_bytes:
+            return
+        self._memory[key] = (cached_at, data, ai_analysis, size)
+        self._memory_bytes += size
+        while self._memory and (len(self._memory) > self.memory_max_entries or self._memory_bytes > self.memory_max_bytes):
+            _, (_, _, _, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def _forget(self, key: str) -> None:
+        """메모리 LRU에서 제거 (lock 안에서 호출)"""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[3]
+
+    def get(self, key: str) -> tuple[float, dict, str | None] | None:
+        """
+        캐시 항목 조회 (메모리 → 디스크 순)
+        만료된 항목도 그대로 반환하므로 만료 판단은 cached_at으로 호출하는 쪽에서 함
+        Returns: (cached_at, data, ai_analysis) - 없으면 None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._is_expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], entry[1], entry[2]
+                self._forget(key)
+
+            row = self._conn.execute(
+                "SELECT cached_at, data, ai_analysis FROM players WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            cached_at, payload, ai_analysis = row
+            data = json.loads(payload)
+            self.disk_hits += 1
+            # 만료된 항목은 메모리에 올리지 않음
+            if not self._is_expired(cached_at):
+                self._remember(key, cached_at, data, ai_analysis, len(payload))
+            return cached_at, data, ai_analysis
+
+    def set(self, key: str, data: dict, ai_analysis: str | None = None) -> None:
+        """캐시 항목 저장 (원자적 upsert, 메모리 LRU도 갱신)"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        cached_at = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO players (cache_key, cached_at, cached_date, data, ai_analysis) VALUES (?, ?, ?, ?, ?)",
+                    (key, cached_at, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), payload, ai_analysis)
+                )
+            self._remember(key, cached_at, data, ai_analysis, len(payload))
+
+    def delete_older_than(self, cutoff: float) -> int:
+        """cached_at이 cutoff보다 오래된 항목 삭제. 삭제 개수 반환"""
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute("DELETE FROM players WHERE cached_at < ?", (cutoff,))
+            for key in [k for k, entry in self._memory.items() if entry[0] < cutoff]:
+                self._forget(key)
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """캐시 히트/미스 통계"""
+        with self._lock:
+            return {
+                "memory_hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,285 @@
+
+# riot_client.py
+import asyncio
+import ssl
+import time
+import aiohttp
+import certifi
+
+# 개발 키 기본 제한 (응답 헤더를 받기 전까지 사용)
+DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+
+# 재시도 대상 (429 + 일시적인 서버 오류)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 429는 실패시키지 않고 이 시간까지 Retry-After만큼 기다리며 재시도
+DEFAULT_MAX_WAIT_SECONDS = 180
+
+
+def parse_rate_limit_header(value: str | None) -> list[tuple[int, int]]:
+    """'20:1,100:120' 형식 헤더를 [(개수, 초), ...]로 변환"""
+    result = []
+    if not value:
+        return result
+    for part in value.split(","):
+        try:
+            count, seconds = part.strip().split(":")
+            result.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+    return result
+
+
+class TokenBucket:
+    """토큰 버킷 (window초 동안 limit개, 연속적으로 충전)"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(float(self.limit), self.tokens + elapsed * self.limit / self.window)
+            self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """토큰 1개를 쓰기까지 기다려야 하는 시간(초)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.window / self.limit
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def sync_count(self, used: int, now: float) -> None:
+        """서버가 알려준 현재 사용량(X-*-Rate-Limit-Count)에 맞춰 토큰 보정"""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(self.limit - used))
+
+
+class RiotRateLimiter:
+    """
+    Riot API 요청 스케줄러
+    - 지역(라우팅 호스트)별 앱 제한 + 지역/메서드별 메서드 제한을 각각 토큰 버킷으로 관리
+    - 응답의 X-App-Rate-Limit / X-Method-Rate-Limit 헤더로 제한값을 갱신
+    - 429 응답 시 Retry-After 동안 해당 버킷을 막고, 요청은 실패시키지 않고 대기열에서 기다림
+    - 대기열은 지역/메서드별이라 한 메서드가 막혀도 같은 지역의 다른 메서드는 계속 진행
+    """
+
+    def __init__(self, default_app_limit: str = DEFAULT_APP_RATE_LIMIT):
+        self.default_app_limit = parse_rate_limit_header(default_app_limit)
+        self._buckets: dict[tuple, list[TokenBucket]] = {}
+        self._blocked_until: dict[tuple, float] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+
+    def _keys(self, routing: str, method: str) -> tuple[tuple, tuple]:
+        return ("app", routing), ("method", routing, method)
+
+    def _get_buckets(self, key: tuple) -> list[TokenBucket]:
+        if key not in self._buckets:
+            # 메서드 제한은 헤더를 받기 전까지 알 수 없으므로 비워둠
+            limits = self.default_app_limit if key[0] == "app" else []
+            self._buckets[key] = [TokenBucket(count, seconds) for count, seconds in limits]
+        return self._buckets[key]
+
+    def _set_limits(self, key: tuple, limits: list[tuple[int, int]], counts: list[tuple[int, int]]) -> None:
+        if not limits:
+            return
+        now = time.monotonic()
+        current = {(b.limit, b.window): b for b in self._get_buckets(key)}
+        buckets = [current.get((count, seconds)) or TokenBucket(count, seconds) for count, seconds in limits]
+        used_by_window = {seconds: used for used, seconds in counts}
+        for bucket in buckets:
+            if bucket.window in used_by_window:
+                bucket.sync_count(used_by_window[bucket.window], now)
+        self._buckets[key] = buckets
+
+    async def acquire(self, routing: str, method: str) -> None:
+        """
+        요청 1회분의 토큰을 확보할 때까지 대기 (지역/메서드별 FIFO 순서)
+        앱 제한 토큰은 확인과 차감 사이에 await가 없으므로 메서드끼리 따로 기다려도 초과하지 않음
+        """
+        keys = self._keys(routing, method)
+        lock = self._locks.setdefault(keys[1], asyncio.Lock())
+        async with lock:
+            while True:
+                now = time.monotonic()
+                wait = max((self._blocked_until.get(key, 0) - now for key in keys), default=0)
+                for key in keys:
+                    for bucket in self._get_buckets(key):
+                        wait = max(wait, bucket.wait_time(now))
+                if wait <= 0:
+                    for key in keys:
+                        for bucket in self._get_buckets(key):
+                            bucket.consume()
+                    return
+                await asyncio.sleep(wait)
+
+    def update(self, routing: str, method: str, headers) -> None:
+        """응답 헤더로 제한값/사용량 갱신"""
+        app_key, method_key = self._keys(routing, method)
+        self._set_limits(
+            app_key,
+            parse_rate_limit_header(headers.get("X-App-Rate-Limit")),
+            parse_rate_limit_header(headers.get("X-App-Rate-Limit-Count")),
+        )
+        self._set_limits(
+            method_key,
+            parse_rate_limit_header(headers.get("X-Method-Rate-Limit")),
+            parse_rate_limit_header(headers.get("X-Method-Rate-Limit-Count")),
+        )
+
+    def block(self, routing: str, method: str, headers) -> float:
+        """429 응답 처리: Retry-After 동안 해당 버킷 차단. 차단 시간(초) 반환"""
+        try:
+            retry_after = float(headers.get("Retry-After", 1))
+        except ValueError:
+            retry_after = 1.0
+        app_key, method_key = self._keys(routing, method)
+        # application 제한이면 지역 전체, 그 외(method/service)는 해당 메서드만 차단
+        key = app_key if headers.get("X-Rate-Limit-Type") == "application" else method_key
+        self._blocked_until[key] = max(self._blocked_until.get(key, 0), time.monotonic() + retry_after)
+        return retry_after
+
+
+class RiotClient:
+    """
+    Riot API 공용 클라이언트
+    - 라우팅 호스트(kr / asia)별로 keep-alive 커넥션 풀을 가진 세션을 재사용
+    - 모든 요청은 RiotRateLimiter를 거쳐 전송됨
+    - 429는 max_wait초 안에서 Retry-After만큼 기다렸다가 계속 재시도, 5xx는 max_retries회까지 백오프 후 재시도
+    - 봇 시작 시 한 번 생성하고, 종료 시 close()로 정리
+    - base_url에 "http://127.0.0.1:8089/{routing}" 같은 값을 주면 로컬 가짜 서버로 요청 (테스트 모드)
+    """
+
+    def __init__(self, api_key: str, ssl_context: ssl.SSLContext | None = None, limit_per_host: int = 10,
+                 base_url: str | None = None, max_retries: int = 5,
+                 max_wait: float = DEFAULT_MAX_WAIT_SECONDS):
+        self.api_key = api_key
+        self.ssl_context = ssl_context or ssl.create_default_context(cafile=certifi.where())
+        self.limit_per_host = limit_per_host
+        self.base_url = base_url or "https://{routing}.api.riotgames.com"
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.rate_limiter = RiotRateLimiter()
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+
+    def _get_session(self, routing: str) -> aiohttp.ClientSession:
+        """라우팅 호스트별 세션 조회 (없으면 생성)"""
+        session = self._sessions.get(routing)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=self.ssl_context,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-Riot-Token": self.api_key},
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+            self._sessions[routing] = session
+        return session
+
+    async def get(self, routing: str, path: str, params: dict | None = None, method: str | None = None) -> tuple[int, object]:
+        """
+        GET 요청 (rate limit 대기 + 429/5xx 재시도)
+        method: 메서드 제한 버킷 이름 (예: "match-v5.getMatch"), 없으면 path 사용
+        Returns: (status, json) - 200이 아니면 json은 None
+        """
+        method = method or path
+        session = self._get_session(routing)
+        url = self.base_url.format(routing=routing) + path
+        deadline = time.monotonic() + self.max_wait
+        server_errors = 0
+        while True:
+            await self.rate_limiter.acquire(routing, method)
+            async with session.get(url, params=params) as resp:
+                status = resp.status
+                self.rate_limiter.update(routing, method, resp.headers)
+                if status == 200:
+                    return status, await resp.json()
+                if status not in RETRY_STATUSES:
+                    return status, None
+                if status == 429:
+                    retry_after = self.rate_limiter.block(routing, method, resp.headers)
+                    if time.monotonic() + retry_after > deadline:
+                        print(f"[Riot] 429 {method} - 최대 대기 시간({self.max_wait:.0f}초) 초과로 포기")
+                        return status, None
+                    print(f"[Riot] 429 {method} - {retry_after:.1f}초 후 재시도")
+                    continue
+            # 5xx: 지수 백오프
+            if server_errors == self.max_retries or time.monotonic() > deadline:
+                return status, None
+            await asyncio.sleep(min(2 ** server_errors * 0.5, 10))
+            server_errors += 1
+
+    async def close(self) -> None:
+        """모든 세션 종료"""
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+
+
+# ==========================================
+# 로컬 테스트용 (429를 돌려주는 가짜 Riot 서버)
+# ==========================================
+async def run_fake_server_test(port: int = 8089, requests: int = 30):
+    """가짜 Riot 서버를 띄우고 동시 요청이 429를 넘어 모두 성공하는지 확인"""
+    from aiohttp import web
+
+    state = {"hits": [], "served": 0, "throttled": 0}
+    app_limit = (10, 1)  # 1초에 10회
+
+    async def handler(request):
+        now = time.monotonic()
+        state["hits"] = [t for t in state["hits"] if now - t < app_limit[1]]
+        headers = {
+            "X-App-Rate-Limit": f"{app_limit[0]}:{app_limit[1]}",
+            "X-App-Rate-Limit-Count": f"{len(state['hits']) + 1}:{app_limit[1]}",
+            "X-Method-Rate-Limit": "50:10",
+            "X-Method-Rate-Limit-Count": f"{state['served'] + 1}:10",
+        }
+        if len(state["hits"]) >= app_limit[0]:
+            state["throttled"] += 1
+            return web.json_response(
+                {"status": {"status_code": 429}}, status=429,
+                headers={**headers, "Retry-After": "1", "X-Rate-Limit-Type": "application"},
+            )
+        state["hits"].append(now)
+        state["served"] += 1
+        return web.json_response({"path": request.path}, headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    # 서버가 알려주는 것보다 느슨한 기본값으로 시작해 429를 유도
+    client = RiotClient("test-key", base_url=f"http://127.0.0.1:{port}/{{routing}}")
+    client.rate_limiter.default_app_limit = [(100, 1)]
+    started = time.monotonic()
+    try:
+        results = await asyncio.gather(*(
+            client.get("asia", f"/lol/match/v5/matches/KR_{i}", method="match-v5.getMatch")
+            for i in range(requests)
+        ))
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    ok = sum(1 for status, _ in results if status == 200)
+    print(f"요청 {requests}회 | 성공 {ok}회 | 서버 429 {state['throttled']}회 | {time.monotonic() - started:.1f}초")
+    return ok == requests
+
+
+if __name__ == "__main__":
+    success = asyncio.run(run_fake_server_test())
+    print("✅ 통과" if success else "❌ 실패")
@@ -0,0 +1,112 @@
+
+# scrim_records.py
+import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def parse_game_time(game_time: str | None) -> int | None:
+    """'분:초' → 초 (형식이 다르면 None)"""
+    try:
+        parts = game_time.split(":")
+        if len(parts) == 2:
+            return int(parts[0]) * 60 + int(parts[1])
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def parse_date(date: str | None) -> datetime.datetime | None:
+    """저장된 날짜 문자열('%Y-%m-%d %H:%M') → datetime (형식이 다르면 None)"""
+    try:
+        return datetime.datetime.fromisoformat(date)
+    except (ValueError, TypeError):
+        return None
+
+
+class MatchRecord(dict):
+    """
+    저장된 경기 1개 (dict 그대로 + 미리 해석해 둔 필드)
+    - 기존 코드처럼 match["result"], match.get("team1")로 읽을 수 있음
+    - 날짜 / 게임 시간 / 승패는 불러올 때 한 번만 해석해 속성으로 보관
+    """
+
+    __slots__ = ("played_at", "duration_seconds", "is_win")
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        self.played_at = parse_date(data.get("date"))
+        self.duration_seconds = parse_game_time(data.get("game_time", "0:00"))
+        self.is_win = data.get("result") == "승리"
+
+    @property
+    def game_minutes(self) -> float:
+        """게임 시간 (분, 모르면 0)"""
+        return self.duration_seconds / 60 if self.duration_seconds is not None else 0
+
+
+# ==========================================
+# 벤치마크: python scrim_records.py [경기 수]
+# ==========================================
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    start_date = datetime.datetime(2025, 1, 1)
+    matches = []
+    for i in range(count):
+        players = [{"nickname": f"p{j}", "kills": rng.randrange(10)} for j in range(5)]
+        matches.append({
+            "date": (start_date + datetime.timedelta(hours=i)).strftime(DATE_FORMAT),
+            "result": rng.choice(["승리", "패배"]),
+            "game_time": f"{rng.randrange(18, 45)}:{rng.randrange(60):02d}",
+            "team1": {"players": players},
+            "team2": {"players": [dict(p) for p in players]},
+        })
+
+    def legacy_pass():
+        """예전 calculate_stats처럼 호출마다 날짜 1번 + 선수마다 게임 시간 파싱"""
+        total = 0.0
+        for match in matches:
+            datetime.datetime.strptime(match["date"], DATE_FORMAT)
+            for team_key in ("team1", "team2"):
+                for _ in match[team_key]["players"]:
+                    parts = match.get("game_time", "0:00").split(":")
+                    if len(parts) == 2:
+                        total += int(parts[0]) + int(parts[1]) / 60
+        return total
+
+    def record_pass(records):
+        """미리 해석한 필드만 읽음"""
+        total = 0.0
+        for record in records:
+            record.played_at
+            minutes = record.game_minutes
+            for team_key in ("team1", "team2"):
+                for _ in record[team_key]["players"]:
+                    total += minutes
+        return total
+
+    repeat = 10
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        legacy = legacy_pass()
+    legacy_time = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    records = [MatchRecord(m) for m in matches]
+    load_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        current = record_pass(records)
+    record_time = (time.perf_counter() - t0) / repeat
+
+    assert abs(legacy - current) < 1e-6 * max(1.0, legacy)
+    print(f"경기 {count}개")
+    print(f"  매번 파싱      : {legacy_time * 1000:8.2f} ms / 호출")
+    print(f"  레코드 (1회 변환): {load_time * 1000:8.2f} ms (불러올 때 한 번)")
+    print(f"  레코드 읽기     : {record_time * 1000:8.2f} ms / 호출 ({legacy_time / record_time:.1f}배)")
@@ -0,0 +1,336 @@
+
+# scrim_stats.py
+import datetime
+
+from scrim_records import MatchRecord
+
+UNKNOWN = "알 수 없음"
+
+# 선수 1명 기록에서 합산하는 필드 (집계 키, 경기 데이터 키)
+PLAYER_SUM_FIELDS = [
+    ("kills", "kills"), ("deaths", "deaths"), ("assists", "assists"),
+    ("damage", "damage"), ("gold", "total_gold"), ("gold_per_min", "gold_per_min"),
+    ("gold_share", "gold_share"), ("damage_per_gold", "damage_per_gold"), ("level", "level"),
+]
+
+# 팀(team1 = 아군) 합계 필드 (집계 키, 경기 데이터 키)
+TEAM_SUM_FIELDS = [
+    ("kills", "total_kills"), ("deaths", "total_deaths"),
+    ("assists", "total_assists"), ("gold", "team_total_gold"),
+]
+
+
+def empty_player_stats() -> dict:
+    stats = {"games": 0, "wins": 0, "losses": 0, "total_game_time": 0}
+    stats.update({key: 0 for key, _ in PLAYER_SUM_FIELDS})
+    return stats
+
+
+def add_player_stats(stats: dict, player: dict, won: bool, game_minutes: float) -> None:
+    """선수 1명의 한 경기 기록을 합계에 더함"""
+    stats["games"] += 1
+    for key, field in PLAYER_SUM_FIELDS:
+        stats[key] += player.get(field, 0)
+    stats["total_game_time"] += game_minutes
+    if won:
+        stats["wins"] += 1
+    else:
+        stats["losses"] += 1
+
+
+def empty_team_stats() -> dict:
+    stats = {
+        "games": 0, "wins": 0,
+        "side_games": {"blue": 0, "red": 0}, "side_wins": {"blue": 0, "red": 0},
+        "timed_games": 0, "time_sum": 0, "time_min": None, "time_max": None,  # 게임 시간 (분)
+    }
+    stats.update({key: 0 for key, _ in TEAM_SUM_FIELDS})
+    return stats
+
+
+def merge_stats(target: dict, source: dict) -> None:
+    """합계 dict끼리 더함 (숫자가 아닌 값은 그대로)"""
+    for key, value in source.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            target[key] += value
+
+
+class StatsBucket:
+    """
+    경기 묶음 1개의 스크림 통계 합계 (경기가 추가될 때마다 해당 경기만 더함)
+    - champion_stats: "포지션-챔피언"별 합계 (team1 = 아군 팀)
+    - player_stats: 닉네임별 합계 (team1 / team2 모두, team2에 있으면 승패 반대)
+    - player_champion_stats: (닉네임, 챔피언)별 합계 (식스맨 챔피언 통계용)
+    - team: 전체 / 진영별 승패, 팀 KDA / 골드 합계, 게임 시간
+    - 연승 / 연패: 처음 / 마지막 연속 기록과 최다 기록만 보관해서 이어 붙일 수 있음
+    - merge()로 시간순 다음 묶음을 이어 붙임 (일별 묶음 → 기간 통계)
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.champion_stats: dict[str, dict] = {}
+        self.player_stats: dict[str, dict] = {}
+        self.player_champion_stats: dict[tuple[str, str], dict] = {}
+        self.team = empty_team_stats()
+        self.first_result: bool | None = None  # 첫 연속 기록의 승패와 길이
+        self.first_streak = 0
+        self.streak_result: bool | None = None  # 마지막(현재) 연속 기록의 승패와 길이
+        self.streak = 0
+        self.max_win_streak = 0
+        self.max_lose_streak = 0
+
+    def add(self, match: MatchRecord) -> None:
+        """경기 1개 반영"""
+        is_win = match.is_win
+        game_minutes = match.game_minutes
+
+        # 챔피언 통계 (team1 = 아군 팀)
+        for player in match.get("team1", {}).get("players", []):
+            champ = player.get("champion")
+            position = player.get("position")
+            if not champ or champ == UNKNOWN:
+                continue
+            key = f"{position}-{champ}"
+            if key not in self.champion_stats:
+                self.champion_stats[key] = {**empty_player_stats(), "position": position, "champion": champ}
+            add_player_stats(self.champion_stats[key], player, is_win, game_minutes)
+
+        # 선수 통계 (team1, team2 모두)
+        for team_key in ("team1", "team2"):
+            won = is_win if team_key == "team1" else not is_win
+            for player in match.get(team_key, {}).get("players", []):
+                nickname = player.get("nickname", UNKNOWN)
+                if nickname == UNKNOWN:
+                    continue
+                if nickname not in self.player_stats:
+                    self.player_stats[nickname] = empty_player_stats()
+                add_player_stats(self.player_stats[nickname], player, won, game_minutes)
+
+                champ = player.get("champion", UNKNOWN)
+                if champ == UNKNOWN:
+                    continue
+                key = (nickname, champ)
+                if key not in self.player_champion_stats:
+                    self.player_champion_stats[key] = empty_player_stats()
+                add_player_stats(self.player_champion_stats[key], player, won, game_minutes)
+
+        # 연승 / 연패 (팀 경기 수를 올리기 전에)
+        games = self.team["games"]
+        if games == 0:
+            self.first_result = is_win
+        if self.first_streak == games and is_win == self.first_result:
+            self.first_streak += 1
+        self.streak = self.streak + 1 if is_win == self.streak_result else 1
+        self.streak_result = is_win
+        if is_win:
+            self.max_win_streak = max(self.max_win_streak, self.streak)
+        else:
+            self.max_lose_streak = max(self.max_lose_streak, self.streak)
+
+        # 팀 통계
+        team = self.team
+        team["games"] += 1
+        team["wins"] += is_win
+        side = match.get("side")
+        if side in team["side_games"]:
+            team["side_games"][side] += 1
+            team["side_wins"][side] += is_win
+        if match.duration_seconds is not None:
+            minutes = match.duration_seconds / 60
+            team["timed_games"] += 1
+            team["time_sum"] += minutes
+            team["time_min"] = minutes if team["time_min"] is None else min(team["time_min"], minutes)
+            team["time_max"] = minutes if team["time_max"] is None else max(team["time_max"], minutes)
+        team1 = match.get("team1", {})
+        for key, field in TEAM_SUM_FIELDS:
+            team[key] += team1.get(field, 0)
+
+    def merge(self, other: "StatsBucket") -> None:
+        """시간순으로 뒤에 오는 묶음을 이어 붙임"""
+        if not other.team["games"]:
+            return
+
+        for key, stats in other.champion_stats.items():
+            if key not in self.champion_stats:
+                self.champion_stats[key] = {**empty_player_stats(), "position": stats["position"], "champion": stats["champion"]}
+            merge_stats(self.champion_stats[key], stats)
+        for nickname, stats in other.player_stats.items():
+            if nickname not in self.player_stats:
+                self.player_stats[nickname] = empty_player_stats()
+            merge_stats(self.player_stats[nickname], stats)
+        for key, stats in other.player_champion_stats.items():
+            if key not in self.player_champion_stats:
+                self.player_champion_stats[key] = empty_player_stats()
+            merge_stats(self.player_champion_stats[key], stats)
+
+        # 연승 / 연패: 앞 묶음의 마지막 기록과 뒤 묶음의 첫 기록이 같으면 이어짐
+        games = self.team["games"]
+        if not games:
+            self.first_result, self.first_streak = other.first_result, other.first_streak
+            self.streak_result, self.streak = other.streak_result, other.streak
+        else:
+            joined = self.streak + other.first_streak if self.streak_result == other.first_result else 0
+            if joined:
+                if other.first_result:
+                    self.max_win_streak = max(self.max_win_streak, joined)
+                else:
+                    self.max_lose_streak = max(self.max_lose_streak, joined)
+            if self.first_streak == games and self.first_result == other.first_result:
+                self.first_streak += other.first_streak
+            if other.streak == other.team["games"] and joined:
+                self.streak = joined
+            else:
+                self.streak = other.streak
+            self.streak_result = other.streak_result
+        self.max_win_streak = max(self.max_win_streak, other.max_win_streak)
+        self.max_lose_streak = max(self.max_lose_streak, other.max_lose_streak)
+
+        team, other_team = self.team, other.team
+        for key in ("games", "wins", "timed_games", "time_sum") + tuple(key for key, _ in TEAM_SUM_FIELDS):
+            team[key] += other_team[key]
+        for side in ("blue", "red"):
+            team["side_games"][side] += other_team["side_games"][side]
+            team["side_wins"][side] += other_team["side_wins"][side]
+        for key, pick in (("time_min", min), ("time_max", max)):
+            if other_team[key] is not None:
+                team[key] = other_team[key] if team[key] is None else pick(team[key], other_team[key])
+
+    def to_stats(self, player_names: list[str] | None = None) -> dict | None:
+        """
+        전적 통계 (total, wins, losses, win_rate, champion_stats, player_stats)
+        player_names가 있으면 해당 선수만 player_stats에 포함
+        """
+        total = self.team["games"]
+        if not total:
+            return None
+        wins = self.team["wins"]
+        return {
+            "total": total,
+            "wins": wins,
+            "losses": total - wins,
+            "win_rate": wins / total * 100,
+            "champion_stats": self.champion_stats,
+            "player_stats": {
+                nickname: stats for nickname, stats in self.player_stats.items()
+                if not player_names or nickname in player_names
+            },
+        }
+
+    def champions_of(self, nicknames: list[str]) -> dict[str, dict]:
+        """지정한 선수들의 챔피언별 합계 ({챔피언: 합계})"""
+        result = {}
+        for (nickname, champ), stats in self.player_champion_stats.items():
+            if nickname not in nicknames:
+                continue
+            if champ not in result:
+                result[champ] = {**empty_player_stats(), "champion": champ}
+            merge_stats(result[champ], stats)
+        return result
+
+    def snapshot(self) -> dict:
+        """비교용 전체 상태"""
+        return {
+            "champion_stats": self.champion_stats,
+            "player_stats": self.player_stats,
+            "player_champion_stats": self.player_champion_stats,
+            "team": self.team,
+            "streak": (self.first_result, self.first_streak, self.streak_result, self.streak,
+                       self.max_win_streak, self.max_lose_streak),
+        }
+
+
+class ScrimAggregates(StatsBucket):
+    """
+    전체 기간 누적 집계 + 날짜별 묶음
+    - sync()로 경기 목록을 따라가며, 목록이 통째로 바뀌면 처음부터 다시 계산
+    - window(시작일, 종료일)은 해당 기간의 날짜별 묶음만 이어 붙여 계산 (경기를 다시 훑지 않음)
+    - 날짜를 읽을 수 없는 경기는 전체 기간 통계에만 포함
+    """
+
+    def clear(self) -> None:
+        super().clear()
+        self.daily: dict[datetime.date, StatsBucket] = {}
+        self._source = None  # sync()로 따라가는 경기 목록
+        self._count = 0  # 반영한 경기 수
+
+    @classmethod
+    def from_matches(cls, matches: list[MatchRecord]) -> "ScrimAggregates":
+        """경기 목록 전체로 새로 계산 (검증용)"""
+        aggregates = cls()
+        for match in matches:
+            aggregates.add(match)
+        return aggregates
+
+    def sync(self, matches: list[MatchRecord]) -> None:
+        """경기 목록에 새로 붙은 경기만 반영 (다른 목록이거나 줄었으면 처음부터)"""
+        if matches is not self._source or len(matches) < self._count:
+            self.clear()
+            self._source = matches
+        for match in matches[self._count:]:
+            self.add(match)
+
+    def add(self, match: MatchRecord) -> None:
+        """경기 1개 반영 (전체 + 해당 날짜 묶음)"""
+        self._count += 1
+        super().add(match)
+        if match.played_at is not None:
+            day = match.played_at.date()
+            if day not in self.daily:
+                self.daily[day] = StatsBucket()
+            self.daily[day].add(match)
+
+    def window(self, start: datetime.date | None = None, end: datetime.date | None = None) -> StatsBucket:
+        """start ~ end (양 끝 포함, None이면 제한 없음) 기간의 통계"""
+        bucket = StatsBucket()
+        for day in sorted(self.daily):
+            if (start is None or day >= start) and (end is None or day <= end):
+                bucket.merge(self.daily[day])
+        return bucket
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["daily"] = {day: bucket.snapshot() for day, bucket in self.daily.items()}
+        return snapshot
+
+
+# ==========================================
+# 검증: python scrim_stats.py [경기 기록 파일]
+# 누적 집계 / 날짜별 묶음을 이어 붙인 결과가 전체 재계산과 같은지 확인
+# ==========================================
+if __name__ == "__main__":
+    import math
+    import sys
+    from match_log import MatchLog
+
+    def same(a, b) -> bool:
+        """합계 비교 (더하는 순서에 따른 실수 오차는 허용)"""
+        if isinstance(a, dict) and isinstance(b, dict):
+            return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+        if isinstance(a, float) or isinstance(b, float):
+            return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+        return a == b
+
+    log = MatchLog(sys.argv[1] if len(sys.argv) > 1 else "scrim_matches.jsonl")
+    records = [MatchRecord(match) for match in log.read_all()]
+
+    incremental = ScrimAggregates()
+    shared = []
+    for record in records:
+        shared.append(record)
+        incremental.sync(shared)
+
+    recomputed = ScrimAggregates.from_matches(records)
+    ok = incremental.snapshot() == recomputed.snapshot()
+
+    # 날짜별 묶음을 모두 이어 붙이면 날짜가 있는 경기를 시간순으로 더한 것과 같아야 함
+    dated = StatsBucket()
+    for record in sorted((r for r in records if r.played_at is not None), key=lambda r: r.played_at):
+        dated.add(record)
+    ok = ok and same(recomputed.window().snapshot(), dated.snapshot())
+
+    print(f"경기 {len(records)}개, {len(recomputed.daily)}일, "
+          f"챔피언 {len(recomputed.champion_stats)}개, 선수 {len(recomputed.player_stats)}명")
+    print("일치" if ok else "불일치")
+    sys.exit(0 if ok else 1)
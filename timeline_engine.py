@@ -0,0 +1,220 @@
+
+# timeline_engine.py
+from array import array
+
+# 엔진 버전 (지표 정의가 바뀌면 올려서 저장된 결과를 무효화)
+ENGINE_VERSION = 1
+
+PARTICIPANT_COUNT = 10
+
+# 이벤트 종류 코드 (분석에 쓰는 이벤트만 남김)
+EVENT_CHAMPION_KILL = 1
+EVENT_TURRET_PLATE = 2
+EVENT_CODES = {
+    "CHAMPION_KILL": EVENT_CHAMPION_KILL,
+    "TURRET_PLATE_DESTROYED": EVENT_TURRET_PLATE,
+}
+
+EARLY_MINUTE = 10  # 10분 전(분 단위 내림 기준 10분까지) 킬/데스/어시스트
+LANE_PHASE_MS = 14 * 60 * 1000  # 라인전 구간 (14분, 포탑 방패가 사라지는 시점)
+
+# 소환사의 협곡 좌표 (대략 0 ~ 14800, 블루팀 기지가 왼쪽 아래)
+RIVER_SUM = 14800  # 강은 x + y ≈ 14800 대각선
+RIVER_HALF_WIDTH = 1200
+LANE_EDGE = 2500  # 사이드 라인 폭
+MID_HALF_WIDTH = 1500  # 미드 라인 폭 (|x - y|)
+BASE_SUM = 5000  # 기지 영역 (블루: x + y < 5000, 레드: x + y > 29600 - 5000)
+
+# teamPosition → 라인
+LANE_OF_POSITION = {
+    "TOP": "top",
+    "MIDDLE": "mid",
+    "BOTTOM": "bot",
+    "UTILITY": "bot",
+}
+
+METRIC_FIELDS = [
+    "early_kills", "early_deaths", "early_assists",
+    "cs_at_10", "cs_at_15", "gold_at_10", "gold_at_15",
+    "lane_kills", "roam_kills", "solo_kills", "ganks_received",
+    "tower_plates", "jungle_invades",
+]
+
+
+def map_region(x: int, y: int) -> str:
+    """
+    좌표 → 지역 이름
+    base_100 / base_200, top / mid / bot, river, jungle_100 / jungle_200 (팀 ID 기준 진영)
+    """
+    if x + y < BASE_SUM:
+        return "base_100"
+    if x + y > 2 * RIVER_SUM - BASE_SUM:
+        return "base_200"
+    if x < LANE_EDGE or y > RIVER_SUM - LANE_EDGE:
+        return "top"
+    if y < LANE_EDGE or x > RIVER_SUM - LANE_EDGE:
+        return "bot"
+    if abs(x - y) < MID_HALF_WIDTH:
+        return "mid"
+    if abs(x + y - RIVER_SUM) < RIVER_HALF_WIDTH:
+        return "river"
+    return "jungle_100" if x + y < RIVER_SUM else "jungle_200"
+
+
+class TimelineColumns:
+    """
+    타임라인을 열(column) 배열로 펼친 것
+    - 이벤트: 종류, 시각(ms), 킬러, 희생자, 어시스트 비트마스크, 좌표
+    - 프레임: 분, 참가자별 CS/골드 ([프레임 * 11 + 참가자 ID])
+    """
+
+    __slots__ = ("kinds", "times", "killers", "victims", "assists", "xs", "ys",
+                 "frame_minutes", "frame_cs", "frame_gold")
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.times = array("q")
+        self.killers = array("b")
+        self.victims = array("b")
+        self.assists = array("H")
+        self.xs = array("l")
+        self.ys = array("l")
+        self.frame_minutes = array("l")
+        self.frame_cs = array("l")
+        self.frame_gold = array("l")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+def flatten_timeline(timeline_data: dict) -> TimelineColumns:
+    """타임라인 JSON을 한 번 순회해 열 배열로 변환 (분석에 쓰지 않는 이벤트는 버림)"""
+    columns = TimelineColumns()
+    if not timeline_data or "info" not in timeline_data:
+        return columns
+
+    for frame in timeline_data["info"].get("frames", []):
+        columns.frame_minutes.append(frame.get("timestamp", 0) // 60000)
+        participant_frames = frame.get("participantFrames", {})
+        columns.frame_cs.append(0)
+        columns.frame_gold.append(0)
+        for pid in range(1, PARTICIPANT_COUNT + 1):
+            player_frame = participant_frames.get(str(pid), {})
+            columns.frame_cs.append(player_frame.get("minionsKilled", 0) + player_frame.get("jungleMinionsKilled", 0))
+            columns.frame_gold.append(player_frame.get("totalGold", 0))
+
+        for event in frame.get("events", []):
+            kind = EVENT_CODES.get(event.get("type"))
+            if kind is None:
+                continue
+            mask = 0
+            for pid in event.get("assistingParticipantIds", []):
+                if 0 < pid <= PARTICIPANT_COUNT:
+                    mask |= 1 << pid
+            position = event.get("position") or {}
+            columns.kinds.append(kind)
+            columns.times.append(event.get("timestamp", 0))
+            columns.killers.append(event.get("killerId") or 0)
+            columns.victims.append(event.get("victimId") or 0)
+            columns.assists.append(mask)
+            columns.xs.append(position.get("x", -1))
+            columns.ys.append(position.get("y", -1))
+    return columns
+
+
+def participant_roles(match_data: dict | None) -> tuple[list[int], list[str]]:
+    """
+    매치 상세에서 참가자 ID별 (팀 ID, teamPosition) 목록 생성 (인덱스 = 참가자 ID)
+    매치 상세가 없으면 1~5번 블루, 6~10번 레드로 보고 포지션은 비워둠
+    """
+    teams = [0] + [100 if pid <= 5 else 200 for pid in range(1, PARTICIPANT_COUNT + 1)]
+    positions = [""] * (PARTICIPANT_COUNT + 1)
+    if match_data and "info" in match_data:
+        for idx, p in enumerate(match_data["info"].get("participants", [])):
+            pid = p.get("participantId", idx + 1)
+            if 0 < pid <= PARTICIPANT_COUNT:
+                teams[pid] = p.get("teamId", teams[pid])
+                positions[pid] = p.get("teamPosition", "")
+    return teams, positions
+
+
+def analyze_all(timeline_data: dict, match_data: dict | None = None) -> dict[int, dict]:
+    """
+    타임라인 1개로 참가자 10명의 지표를 한 번에 계산
+    Returns: {참가자 ID: {지표: 값}}
+    - lane_kills: 라인전 구간에 자기 라인에서 낸 킬
+    - roam_kills: 라인전 구간에 다른 라인에서 낸 킬
+    - ganks_received: 라인전 구간에 자기 라인에서 상대 정글이 관여해 죽은 횟수
+    - jungle_invades: 상대 정글에서 관여한 킬
+    (포지션 기반 지표는 match_data가 있어야 계산됨)
+    """
+    columns = flatten_timeline(timeline_data)
+    teams, positions = participant_roles(match_data)
+    lanes = [LANE_OF_POSITION.get(position) for position in positions]
+    junglers = {teams[pid]: pid for pid in range(1, PARTICIPANT_COUNT + 1) if positions[pid] == "JUNGLE"}
+
+    size = PARTICIPANT_COUNT + 1
+    counters = {field: [0] * size for field in METRIC_FIELDS}
+    early_kills = counters["early_kills"]
+    early_deaths = counters["early_deaths"]
+    early_assists = counters["early_assists"]
+    lane_kills = counters["lane_kills"]
+    roam_kills = counters["roam_kills"]
+    solo_kills = counters["solo_kills"]
+    ganks_received = counters["ganks_received"]
+    tower_plates = counters["tower_plates"]
+    jungle_invades = counters["jungle_invades"]
+
+    # 이벤트 1회 순회
+    for kind, t, killer, victim, mask, x, y in zip(
+        columns.kinds, columns.times, columns.killers, columns.victims, columns.assists, columns.xs, columns.ys
+    ):
+        if kind == EVENT_TURRET_PLATE:
+            tower_plates[killer] += 1
+            continue
+
+        assisting = [pid for pid in range(1, size) if mask >> pid & 1]
+        if t // 60000 <= EARLY_MINUTE:
+            early_kills[killer] += 1
+            early_deaths[victim] += 1
+            for pid in assisting:
+                early_assists[pid] += 1
+        if not mask:
+            solo_kills[killer] += 1
+
+        if x < 0 or y < 0:
+            continue
+        region = map_region(x, y)
+
+        if t < LANE_PHASE_MS:
+            if lanes[killer]:
+                if region == lanes[killer]:
+                    lane_kills[killer] += 1
+                elif region in ("top", "mid", "bot"):
+                    roam_kills[killer] += 1
+            enemy_jungler = junglers.get(200 if teams[victim] == 100 else 100)
+            if (lanes[victim] and region == lanes[victim] and enemy_jungler
+                    and (killer == enemy_jungler or mask >> enemy_jungler & 1)):
+                ganks_received[victim] += 1
+
+        if region.startswith("jungle_"):
+            jungle_team = int(region[7:])
+            for pid in [killer] + assisting:
+                if pid and teams[pid] != jungle_team:
+                    jungle_invades[pid] += 1
+
+    # 10분 / 15분 프레임 스냅샷
+    for frame_index, minute in enumerate(columns.frame_minutes):
+        if minute not in (10, 15):
+            continue
+        offset = frame_index * size
+        cs_field, gold_field = ("cs_at_10", "gold_at_10") if minute == 10 else ("cs_at_15", "gold_at_15")
+        counters[cs_field] = list(columns.frame_cs[offset:offset + size])
+        counters[gold_field] = list(columns.frame_gold[offset:offset + size])
+
+    result = {}
+    for pid in range(1, size):
+        metrics = {field: counters[field][pid] for field in METRIC_FIELDS}
+        metrics["first_blood_time"] = None
+        result[pid] = metrics
+    return result